@@ -18,7 +18,7 @@ from litestar.status_codes import (
 )
 from litestar.types import ExceptionHandlersMap
 
-from sshared.logging import Logger
+from sshared.logging import AsyncLogger, Logger
 
 from .response import error
 
@@ -85,7 +85,7 @@ def validation_exception_handler(
     if isinstance(exception.extra, list):
         details = get_validation_exception_details(exception.extra)
     else:
-        logger: Logger = request.app.state.logger
+        logger: Logger | AsyncLogger = request.app.state.logger
         logger.warn("无法获取数据校验失败异常详情")
 
         details = None
@@ -105,7 +105,7 @@ def unknown_exception_handler(request: Request, exception: Exception) -> Respons
             details="请检查请求体格式",
         )
 
-    logger: Logger = request.app.state.logger
+    logger: Logger | AsyncLogger = request.app.state.logger
     logger.error("处理请求时发生异常", exception=exception)
 
     return error(
@@ -4,14 +4,39 @@ from typing import Callable
 
 from litestar import Litestar
 
-from sshared.logging import Logger
-from sshared.postgres import Pool
+from sshared.logging import AsyncLogger, Logger
+from sshared.postgres import Pool, PoolGroup
+
+
+@asynccontextmanager
+async def logger_lifespan(app: Litestar) -> AsyncGenerator[None]:
+    logger: Logger | AsyncLogger = app.state.logger
+
+    # 同步日志记录器无需启动
+    if not isinstance(logger, AsyncLogger):
+        yield
+        return
+
+    await logger.start()
+    logger.debug("日志记录器已启动")
+
+    try:
+        yield
+    finally:
+        logger.debug("日志记录器已关闭")
+        await logger.close()
+
+        # 日志记录器使用的连接池在写入剩余记录后关闭
+        if logger.pool is not None:
+            await logger.pool.close()
 
 
 @asynccontextmanager
 async def db_pools_lifespan(app: Litestar) -> AsyncGenerator[None]:
-    db_pools: tuple[Pool, ...] = app.state.db_pools
-    logger: Logger = app.state.logger
+    db_pools: tuple[Pool | PoolGroup, ...] = app.state.db_pools
+    logger: Logger | AsyncLogger = app.state.logger
+    # 日志记录器使用的连接池由 logger_lifespan 关闭
+    logger_pool = logger.pool if isinstance(logger, AsyncLogger) else None
 
     for pool in db_pools:
         await pool.prepare()
@@ -21,10 +46,14 @@ async def db_pools_lifespan(app: Litestar) -> AsyncGenerator[None]:
         yield
     finally:
         for pool in db_pools:
+            if pool is logger_pool:
+                continue
             await pool.close()
             logger.debug("数据库连接池已关闭")
 
 
+# 日志记录器最先启动、最后关闭，以便记录其它 lifespan 中的日志
 LIFESPANS: tuple[Callable[[Litestar], AbstractAsyncContextManager], ...] = (
+    logger_lifespan,
     db_pools_lifespan,
 )
@@ -1,10 +1,14 @@
+from __future__ import annotations
+
 from litestar.datastructures import State
 
-from sshared.logging import Logger
-from sshared.postgres import Pool
+from sshared.logging import AsyncLogger, Logger
+from sshared.postgres import Pool, PoolGroup
 
 
-def get_app_state(*, logger: Logger, db_pools: tuple[Pool, ...]) -> State:
+def get_app_state(
+    *, logger: Logger | AsyncLogger, db_pools: tuple[Pool | PoolGroup, ...]
+) -> State:
     return State(
         {
             "logger": logger,
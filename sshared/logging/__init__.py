@@ -1 +1,31 @@
+from typing import TYPE_CHECKING
+
+from .async_logger import AsyncLogger
+from .file_sink import FileSink, get_rotated_files, load_log_file
 from .logger import Logger
+from .query import (
+    LogCursor,
+    LogFilter,
+    LogPage,
+    acreate_query_indexes,
+    afetch_log_page,
+    astream_logs,
+    create_query_indexes,
+    fetch_log_page,
+    stream_logs,
+)
+from .rate_limit import RateLimitRule
+from .terminal_sink import TerminalSink
+
+if TYPE_CHECKING:
+    from .collector import LogCollector
+
+
+def __getattr__(name: str) -> "type[LogCollector]":
+    # 日志收集器依赖 Unix Domain Socket，仅在使用时导入，以便在 Windows 上导入本模块
+    if name == "LogCollector":
+        from .collector import LogCollector
+
+        return LogCollector
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import sys
+from asyncio import (
+    AbstractEventLoop,
+    CancelledError,
+    Event,
+    Task,
+    get_running_loop,
+    sleep,
+    wait_for,
+)
+from asyncio import TimeoutError as AsyncTimeoutError
+from contextlib import suppress
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import TYPE_CHECKING, Literal
+
+from sshared.logging.base import BaseLogger
+from sshared.logging.buffer import LogBuffer, LogBufferStats
+from sshared.logging.config import PARTITION_MAINTENANCE_INTERVAL, PARTITION_PREMAKE
+from sshared.logging.file_sink import FileSink
+from sshared.logging.rate_limit import RateLimitRule
+from sshared.logging.record import Record
+from sshared.logging.terminal_sink import TerminalSink
+from sshared.logging.types import LogLevelType, PartitionIntervalType
+from sshared.terminal.exception import pretty_exception
+
+if TYPE_CHECKING:
+    from psycopg import AsyncConnection, sql
+
+    from sshared.logging.collector import AsyncCollectorSender
+    from sshared.postgres import Pool
+
+
+class AsyncLogger(BaseLogger):
+    """基于 asyncio 的日志记录器。
+
+    日志方法与 Logger 相同且不会阻塞事件循环，需要保存的记录放入有界缓冲区，
+    由后台任务通过连接池批量写入数据库。
+
+    调用 start 后开始写入，调用 close 写入剩余记录。
+    连接池由调用方负责关闭，且应在 close 之后关闭。
+
+    指定 collector_socket 时，记录发送到 LogCollector 所在进程，不使用连接池。
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        display_level: LogLevelType = "DEBUG",
+        save_level: LogLevelType = "DEBUG",
+        pool: Pool | None = None,
+        table: str | None = None,
+        *,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        buffer_size: int = 10000,
+        overflow_policy: Literal["DROP_OLDEST", "DROP_NEWEST"] = "DROP_OLDEST",
+        terminal_sink: TerminalSink | None = None,
+        file_sink: FileSink | None = None,
+        rate_limits: dict[LogLevelType, RateLimitRule] | None = None,
+        dedup_exceptions: bool = False,
+        partition_interval: PartitionIntervalType | None = None,
+        retention: timedelta | None = None,
+        collector_socket: str | None = None,
+    ) -> None:
+        super().__init__(
+            display_level,
+            save_level,
+            save_enabled=bool(pool and table) or bool(collector_socket),
+            terminal_sink=terminal_sink,
+            file_sink=file_sink,
+            rate_limits=rate_limits,
+        )
+        self._pool = pool
+        self._table = table
+        self._dedup_exceptions = dedup_exceptions
+        self._partition_interval: PartitionIntervalType | None = partition_interval
+        self._retention = retention
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+
+        self._buffer = LogBuffer(buffer_size, overflow_policy=overflow_policy)
+        self._copy_statement: sql.Composed | None = None
+        self._loop: AbstractEventLoop | None = None
+        self._wakeup: Event | None = None
+        self._flush_task: Task | None = None
+        self._partition_maintainer: Task | None = None
+        self._closing = False
+        # 是否已报告当前的不可用状态
+        self._unavailable = False
+
+        self._collector_sender: AsyncCollectorSender | None = None
+        if collector_socket:
+            from sshared.logging.collector import AsyncCollectorSender
+
+            self._collector_sender = AsyncCollectorSender(collector_socket)
+
+    async def _init_db(self, pool: Pool, table: str) -> None:
+        from sshared.logging.schema import (
+            get_copy_statement,
+            get_exception_upsert_statement,
+            get_init_statements,
+        )
+        from sshared.postgres import enhance_json_process
+
+        enhance_json_process()
+
+        async with pool.get_conn() as conn:
+            for statement in get_init_statements(
+                table,
+                dedup_exceptions=self._dedup_exceptions,
+                partition_interval=self._partition_interval,
+            ):
+                await conn.execute(statement)
+
+        # 写入前需要确保当前分区已存在，之后由后台任务定期维护
+        await self._maintain_partitions(pool, table)
+
+        self._copy_statement = get_copy_statement(
+            table, dedup_exceptions=self._dedup_exceptions
+        )
+        self._exception_upsert_statement = get_exception_upsert_statement(table)
+
+    async def _maintain_partitions(self, pool: Pool, table: str) -> None:
+        """创建未来的分区，并删除超出保留期限的分区。"""
+        from sshared.logging.schema import (
+            get_create_partition_statements,
+            get_drop_partition_statements,
+            get_list_partitions_statement,
+        )
+
+        if self._partition_interval is None:
+            return
+
+        now = datetime.now()
+
+        async with pool.get_conn() as conn:
+            for statement in get_create_partition_statements(
+                table,
+                interval=self._partition_interval,
+                now=now,
+                premake=PARTITION_PREMAKE,
+            ):
+                await conn.execute(statement)
+
+            if self._retention is None:
+                return
+
+            cursor = await conn.execute(get_list_partitions_statement(table))
+            partitions = [x[0] for x in await cursor.fetchall()]
+            for statement in get_drop_partition_statements(
+                table,
+                partitions,
+                interval=self._partition_interval,
+                now=now,
+                retention=self._retention,
+            ):
+                await conn.execute(statement)
+
+    async def _run_partition_maintainer(self, pool: Pool, table: str) -> None:
+        while True:
+            await sleep(PARTITION_MAINTENANCE_INTERVAL)
+            try:
+                await self._maintain_partitions(pool, table)
+            except Exception as e:
+                # 维护失败时不能再通过日志记录器报告，否则可能陷入循环
+                print(  # noqa: T201
+                    f"日志表分区维护失败\n{pretty_exception(e)}", file=sys.stderr
+                )
+
+    async def _save_exceptions(
+        self, conn: AsyncConnection, records: list[Record]
+    ) -> list[int | None]:
+        """写入记录中的异常堆栈，返回每条记录对应的异常 ID。"""
+        from sshared.logging.schema import group_exceptions
+
+        fingerprints, params = group_exceptions(records)
+        if not params:
+            return [None] * len(records)
+
+        exception_ids: dict[str, int] = {}
+        async with conn.cursor() as cursor:
+            await cursor.executemany(
+                self._exception_upsert_statement, params, returning=True
+            )
+            # 每组参数对应一个结果集，顺序与参数顺序相同
+            for fingerprint, *_ in params:
+                exception_ids[fingerprint] = (await cursor.fetchone())[0]  # type: ignore
+                cursor.nextset()
+
+        return [exception_ids[x] if x else None for x in fingerprints]
+
+    async def _save_batch(self, records: list[Record]) -> None:
+        from sshared.logging.schema import record_to_dedup_row, record_to_row
+
+        if self._collector_sender is not None:
+            await self._collector_sender.send(records)
+            return
+
+        if self._pool is None or self._copy_statement is None:
+            return
+
+        async with self._pool.get_conn() as conn:
+            if self._dedup_exceptions:
+                exception_ids = await self._save_exceptions(conn, records)
+                rows = map(record_to_dedup_row, records, exception_ids)
+            else:
+                rows = map(record_to_row, records)
+
+            statement = self._copy_statement
+            async with conn.cursor() as cursor, cursor.copy(statement) as copy:
+                for row in rows:
+                    await copy.write_row(row)
+
+    async def _flush(self) -> float | None:
+        """写入缓冲区中的所有记录。
+
+        数据库暂时不可用（断路器断开或获取连接超时）时，将当前批次放回缓冲区，
+        返回重试前等待的秒数，期间由缓冲区的 overflow_policy 决定丢弃哪些记录。
+        每次不可用只报告一次。关闭时不再重试。
+        """
+        from sshared.logging.writer import get_unavailable_delay
+
+        while batch := self._buffer.take(self._batch_size):
+            try:
+                await self._save_batch(batch)
+            except Exception as e:
+                delay = (
+                    get_unavailable_delay(e) if self._collector_sender is None else None
+                )
+                if delay is not None and not self._closing:
+                    self._buffer.requeue(batch)
+                    if not self._unavailable:
+                        self._unavailable = True
+                        print(  # noqa: T201
+                            f"数据库不可用，日志暂存在缓冲区中等待重试\n{pretty_exception(e)}",
+                            file=sys.stderr,
+                        )
+                    return delay
+
+                self._buffer.task_done(len(batch), failed=True)
+                # 写入失败时不能再通过日志记录器报告，否则可能陷入循环
+                # 已报告的不可用期间不再重复报告
+                if delay is None or not self._unavailable:
+                    print(  # noqa: T201
+                        f"批量写入 {len(batch)} 条日志失败\n{pretty_exception(e)}",
+                        file=sys.stderr,
+                    )
+            else:
+                self._buffer.task_done(len(batch))
+                self._unavailable = False
+
+        return None
+
+    async def _wait_retry(self, wakeup: Event, timeout: float) -> None:
+        """等待 timeout 秒后重试写入，期间仅在关闭时提前结束等待。"""
+        deadline = monotonic() + timeout
+        while not self._closing and (remaining := deadline - monotonic()) > 0:
+            with suppress(AsyncTimeoutError):
+                await wait_for(wakeup.wait(), remaining)
+            wakeup.clear()
+
+    async def _run(self, wakeup: Event) -> None:
+        delay: float | None = None
+        while not self._closing:
+            if delay is None:
+                # 达到批次大小时被唤醒，否则等待 flush_interval 秒
+                with suppress(AsyncTimeoutError):
+                    await wait_for(wakeup.wait(), self._flush_interval)
+                wakeup.clear()
+            else:
+                await self._wait_retry(wakeup, max(delay, self._flush_interval))
+
+            delay = await self._flush()
+
+        # 关闭前写入所有剩余记录
+        await self._flush()
+
+    def _save(self, record: Record) -> None:
+        if not self._buffer.put(record):
+            return
+
+        # 仅在记录数量刚好达到批次大小时唤醒写入任务
+        if (
+            len(self._buffer) == self._batch_size
+            and self._loop is not None
+            and self._wakeup is not None
+        ):
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def start(self) -> None:
+        """准备连接池、创建日志表，并启动后台写入任务。"""
+        if self._flush_task:
+            return
+
+        if self._collector_sender is None:
+            if self._pool is None or self._table is None:
+                return
+
+            await self._pool.prepare()
+            await self._init_db(self._pool, self._table)
+
+        self._loop = get_running_loop()
+        self._wakeup = Event()
+        self._flush_task = self._loop.create_task(self._run(self._wakeup))
+        if (
+            self._partition_interval is not None
+            and self._collector_sender is None
+            and self._pool is not None
+            and self._table is not None
+        ):
+            self._partition_maintainer = self._loop.create_task(
+                self._run_partition_maintainer(self._pool, self._table)
+            )
+
+    async def close(self) -> None:
+        """写入所有剩余记录，并停止后台写入任务。"""
+        if self._flush_task is None or self._wakeup is None:
+            return
+
+        self._emit_suppressed_summaries(force=True)
+
+        if self._partition_maintainer is not None:
+            self._partition_maintainer.cancel()
+            with suppress(CancelledError):
+                await self._partition_maintainer
+            self._partition_maintainer = None
+
+        self._closing = True
+        self._wakeup.set()
+        await self._flush_task
+        self._flush_task = None
+
+        if self._collector_sender is not None:
+            await self._collector_sender.close()
+
+    @property
+    def pool(self) -> Pool | None:
+        return self._pool
+
+    @property
+    def buffer_stats(self) -> LogBufferStats:
+        """缓冲区的待写入、已丢弃和写入失败记录数量。"""
+        return self._buffer.stats
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+from sshared.logging.config import LOG_LEVEL_CONFIG
+from sshared.logging.file_sink import FileSink
+from sshared.logging.rate_limit import RateLimiter, RateLimitRule
+from sshared.logging.record import ExceptionField, ExceptionStackField, Record
+from sshared.logging.terminal_sink import TerminalSink
+from sshared.logging.types import ExtraType, LogLevelType
+from sshared.terminal.exception import get_exception_stack
+
+_DEBUG_NUM = LOG_LEVEL_CONFIG["DEBUG"].num
+_INFO_NUM = LOG_LEVEL_CONFIG["INFO"].num
+_WARN_NUM = LOG_LEVEL_CONFIG["WARN"].num
+_ERROR_NUM = LOG_LEVEL_CONFIG["ERROR"].num
+_FATAL_NUM = LOG_LEVEL_CONFIG["FATAL"].num
+
+
+class BaseLogger(ABC):
+    """日志记录器基类，负责构建与输出记录，保存逻辑由子类实现。"""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        display_level: LogLevelType,
+        save_level: LogLevelType,
+        *,
+        save_enabled: bool,
+        terminal_sink: TerminalSink | None,
+        file_sink: FileSink | None,
+        rate_limits: dict[LogLevelType, RateLimitRule] | None,
+    ) -> None:
+        self._display_level_num = LOG_LEVEL_CONFIG[display_level].num
+        self._save_level_num = LOG_LEVEL_CONFIG[save_level].num
+        self._save_enabled = save_enabled
+        self._file_sink = file_sink
+
+        # 低于该等级的日志既不输出也不保存，可以跳过构建记录的过程
+        self._min_level_num = (
+            min(self._display_level_num, self._save_level_num)
+            if save_enabled or file_sink is not None
+            else self._display_level_num
+        )
+
+        self._terminal_sink = (
+            terminal_sink if terminal_sink is not None else TerminalSink()
+        )
+        self._rate_limiter = RateLimiter(rate_limits) if rate_limits else None
+
+    @abstractmethod
+    def _save(self, record: Record) -> None: ...
+
+    def _log(
+        self,
+        msg: str,
+        /,
+        *,
+        level: LogLevelType,
+        level_num: int,
+        exception: Exception | None,
+        **kwargs: ExtraType,
+    ) -> None:
+        if self._rate_limiter is not None:
+            allowed, suppressed = self._rate_limiter.acquire(level, msg)
+            # 报告已不再出现或已被淘汰的日志的抑制数量
+            self._emit_suppressed_summaries()
+            if not allowed:
+                return
+
+            # 在该日志再次通过限流时，报告此前被抑制的数量
+            if suppressed:
+                self._emit_suppressed(level, msg, suppressed)
+
+        exc_stack = get_exception_stack(exception) if exception else None
+
+        record = Record(
+            time=datetime.now(),
+            level=level,
+            msg=msg,
+            extra=kwargs if kwargs else None,
+            exception=ExceptionField(
+                name=type(exception).__name__,
+                desc=repr(exception.args[0]) if len(exception.args) else None,
+                stack=tuple(
+                    ExceptionStackField(
+                        file_name=item.file_name,
+                        line_number=item.line_number,
+                        func_name=item.func_name,
+                        line=item.line,
+                    )
+                    for item in exc_stack
+                )
+                if exc_stack
+                else None,
+            )
+            if exception
+            else None,
+        ).validate()
+
+        self._emit(record, level_num)
+
+    def _emit_suppressed(self, level: LogLevelType, msg: str, count: int) -> None:
+        self._emit(
+            Record(
+                time=datetime.now(),
+                level=level,
+                msg=f"已抑制 {count} 条重复日志",
+                extra={"msg": msg, "count": count},
+                exception=None,
+            ),
+            LOG_LEVEL_CONFIG[level].num,
+        )
+
+    def _emit_suppressed_summaries(self, *, force: bool = False) -> None:
+        if self._rate_limiter is None:
+            return
+
+        for level, msg, count in self._rate_limiter.take_summaries(force=force):
+            self._emit_suppressed(level, msg, count)
+
+    def _emit(self, record: Record, level_num: int) -> None:
+        if level_num >= self._display_level_num:
+            self._terminal_sink.write(record)
+
+        if level_num >= self._save_level_num:
+            self._save_to_sinks(record)
+
+    def _save_to_sinks(self, record: Record) -> None:
+        if self._file_sink is not None:
+            self._file_sink.write(record)
+        if self._save_enabled:
+            self._save(record)
+
+    def save_record(self, record: Record, /) -> None:
+        """保存已构建的记录，不输出到终端。
+
+        用于汇总其它进程的日志，仍受 save_level 限制。
+        """
+        if LOG_LEVEL_CONFIG[record.level].num >= self._save_level_num:
+            self._save_to_sinks(record)
+
+    def debug(self, msg: str, /, **kwargs: ExtraType) -> None:
+        if self._min_level_num > _DEBUG_NUM:
+            return
+
+        self._log(msg, level="DEBUG", level_num=_DEBUG_NUM, exception=None, **kwargs)
+
+    def info(self, msg: str, /, **kwargs: ExtraType) -> None:
+        if self._min_level_num > _INFO_NUM:
+            return
+
+        self._log(msg, level="INFO", level_num=_INFO_NUM, exception=None, **kwargs)
+
+    def warn(
+        self, msg: str, /, *, exception: Exception | None = None, **kwargs: ExtraType
+    ) -> None:
+        if self._min_level_num > _WARN_NUM:
+            return
+
+        self._log(msg, level="WARN", level_num=_WARN_NUM, exception=exception, **kwargs)
+
+    def error(
+        self, msg: str, /, *, exception: Exception | None = None, **kwargs: ExtraType
+    ) -> None:
+        if self._min_level_num > _ERROR_NUM:
+            return
+
+        self._log(
+            msg, level="ERROR", level_num=_ERROR_NUM, exception=exception, **kwargs
+        )
+
+    def fatal(
+        self, msg: str, /, *, exception: Exception | None = None, **kwargs: ExtraType
+    ) -> None:
+        if self._min_level_num > _FATAL_NUM:
+            return
+
+        self._log(
+            msg, level="FATAL", level_num=_FATAL_NUM, exception=exception, **kwargs
+        )
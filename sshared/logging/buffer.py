@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from collections import deque
+from threading import Condition
+from time import monotonic
+
+from sshared.logging.record import Record
+from sshared.logging.types import OverflowPolicyType
+from sshared.strict_struct import NonNegativeInt, StrictFrozenStruct
+
+
+class LogBufferStats(StrictFrozenStruct, frozen=True, eq=False, gc=False):
+    pending: NonNegativeInt
+    dropped: NonNegativeInt
+    failed: NonNegativeInt
+
+
+class LogBuffer:
+    """有界日志缓冲区。
+
+    缓冲区已满时，根据 overflow_policy 处理新记录：
+    - DROP_OLDEST：丢弃最早的记录
+    - DROP_NEWEST：丢弃新记录
+    - BLOCK：最多阻塞 block_timeout 秒等待空位，超时后丢弃新记录
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        /,
+        *,
+        overflow_policy: OverflowPolicyType = "DROP_OLDEST",
+        block_timeout: float = 0.1,
+    ) -> None:
+        self._max_size = max_size
+        self._overflow_policy: OverflowPolicyType = overflow_policy
+        self._block_timeout = block_timeout
+
+        self._items: deque[Record] = deque()
+        self._condition = Condition()
+        self._wake_size = 1
+        self._closed = False
+
+        self._in_flight = 0
+        self._dropped = 0
+        self._failed = 0
+
+    def put(self, record: Record, /) -> bool:
+        """放入记录，返回记录是否被接收。"""
+        with self._condition:
+            if self._closed:
+                return False
+
+            if len(self._items) >= self._max_size:
+                if self._overflow_policy == "DROP_OLDEST":
+                    self._items.popleft()
+                    self._dropped += 1
+                # DROP_NEWEST 策略直接丢弃，BLOCK 策略等待超时后丢弃
+                elif self._overflow_policy == "DROP_NEWEST" or not (
+                    self._condition.wait_for(
+                        lambda: len(self._items) < self._max_size or self._closed,
+                        self._block_timeout,
+                    )
+                ):
+                    self._dropped += 1
+                    return False
+
+            self._items.append(record)
+            # 仅在缓冲区由空变为非空，或记录数量达到批次大小时唤醒写入线程
+            # 避免每条记录都引起一次线程切换
+            if len(self._items) in {1, self._wake_size}:
+                self._condition.notify_all()
+
+            return True
+
+    def get_batch(self, max_count: int, /, *, max_wait: float) -> list[Record] | None:
+        """取出一批记录。
+
+        阻塞等待至少一条记录，之后继续等待，直到凑满 max_count 条记录，
+        或等待时间超过 max_wait 秒。
+
+        缓冲区已关闭且为空时返回 None。
+        """
+        with self._condition:
+            self._wake_size = max_count
+
+            self._condition.wait_for(lambda: self._items or self._closed)
+            if not self._items:
+                return None
+
+            deadline = monotonic() + max_wait
+            while len(self._items) < max_count and not self._closed:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            count = min(max_count, len(self._items))
+            batch = [self._items.popleft() for _ in range(count)]
+            self._in_flight += count
+            # 唤醒因缓冲区已满而阻塞的调用方
+            self._condition.notify_all()
+
+            return batch
+
+    def take(self, max_count: int, /) -> list[Record]:
+        """取出最多 max_count 条记录，不阻塞。"""
+        with self._condition:
+            count = min(max_count, len(self._items))
+            batch = [self._items.popleft() for _ in range(count)]
+            self._in_flight += count
+            self._condition.notify_all()
+
+            return batch
+
+    def requeue(self, batch: list[Record], /) -> None:
+        """将取出后未能写入的记录放回缓冲区头部，等待重试。
+
+        放回后超出容量时，根据 overflow_policy 丢弃多余记录：
+        DROP_OLDEST 丢弃最早的记录，其余策略丢弃最新的记录。
+        """
+        with self._condition:
+            self._in_flight -= len(batch)
+            self._items.extendleft(reversed(batch))
+
+            overflow = len(self._items) - self._max_size
+            if overflow > 0:
+                pop = (
+                    self._items.popleft
+                    if self._overflow_policy == "DROP_OLDEST"
+                    else self._items.pop
+                )
+                for _ in range(overflow):
+                    pop()
+                self._dropped += overflow
+
+    def wait_closed(self, timeout: float, /) -> bool:
+        """最多等待 timeout 秒，返回缓冲区是否已关闭。"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._closed, timeout)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def task_done(self, count: int, /, *, failed: bool = False) -> None:
+        """标记 get_batch 取出的记录已处理完成。"""
+        with self._condition:
+            self._in_flight -= count
+            if failed:
+                self._failed += count
+
+    def close(self) -> None:
+        """关闭缓冲区，此后放入的记录将被丢弃。"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def stats(self) -> LogBufferStats:
+        with self._condition:
+            return LogBufferStats(
+                pending=len(self._items) + self._in_flight,
+                dropped=self._dropped,
+                failed=self._failed,
+            )
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from asyncio import StreamWriter, open_unix_connection
+from contextlib import suppress
+from pathlib import Path
+from socket import AF_UNIX, SOCK_STREAM, socket
+from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+from struct import Struct as BinaryStruct
+from threading import Lock, Thread
+from typing import TYPE_CHECKING, cast
+
+from msgspec import DecodeError
+from msgspec.msgpack import Decoder, Encoder
+
+from sshared.logging.record import Record
+
+if TYPE_CHECKING:
+    from sshared.logging.base import BaseLogger
+
+# 每个数据帧由 4 字节大端序长度与 msgpack 编码的记录列表组成
+FRAME_HEADER = BinaryStruct(">I")
+
+
+def encode_frame(records: list[Record], encoder: Encoder) -> bytes:
+    payload = encoder.encode(records)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+class CollectorSender:
+    """通过 Unix Domain Socket 将日志记录批量发送到 LogCollector。
+
+    连接在首次发送时建立，发送失败时重新连接并重试一次，仍失败则抛出异常。
+    """
+
+    def __init__(self, socket_path: str, /) -> None:
+        self._socket_path = socket_path
+        self._encoder = Encoder()
+        self._socket: socket | None = None
+        self._lock = Lock()
+
+    def _connect(self) -> socket:
+        sock = socket(AF_UNIX, SOCK_STREAM)
+        try:
+            sock.connect(self._socket_path)
+        except OSError:
+            sock.close()
+            raise
+
+        return sock
+
+    def _close_socket(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def send(self, records: list[Record], /) -> None:
+        frame = encode_frame(records, self._encoder)
+
+        with self._lock:
+            try:
+                if self._socket is None:
+                    self._socket = self._connect()
+                self._socket.sendall(frame)
+            except OSError:
+                # 汇总进程可能已重启，重新连接后重试一次
+                self._close_socket()
+                self._socket = self._connect()
+                self._socket.sendall(frame)
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_socket()
+
+
+class AsyncCollectorSender:
+    """CollectorSender 的 asyncio 版本。"""
+
+    def __init__(self, socket_path: str, /) -> None:
+        self._socket_path = socket_path
+        self._encoder = Encoder()
+        self._writer: StreamWriter | None = None
+
+    async def _write(self, frame: bytes) -> None:
+        if self._writer is None:
+            _, self._writer = await open_unix_connection(self._socket_path)
+
+        self._writer.write(frame)
+        await self._writer.drain()
+
+    async def send(self, records: list[Record], /) -> None:
+        frame = encode_frame(records, self._encoder)
+
+        try:
+            await self._write(frame)
+        except OSError:
+            # 汇总进程可能已重启，重新连接后重试一次
+            await self.close()
+            await self._write(frame)
+
+    async def close(self) -> None:
+        if self._writer is None:
+            return
+
+        writer = self._writer
+        self._writer = None
+        writer.close()
+        with suppress(OSError):
+            await writer.wait_closed()
+
+
+class _CollectorRequestHandler(StreamRequestHandler):
+    def handle(self) -> None:
+        logger = cast("_CollectorServer", self.server).logger
+        decoder = Decoder(list[Record])
+
+        while True:
+            header = self.rfile.read(FRAME_HEADER.size)
+            # 连接已关闭
+            if len(header) < FRAME_HEADER.size:
+                return
+
+            (length,) = FRAME_HEADER.unpack(header)
+            payload = self.rfile.read(length)
+            if len(payload) < length:
+                return
+
+            try:
+                records = decoder.decode(payload)
+            except DecodeError:
+                continue
+
+            for record in records:
+                logger.save_record(record)
+
+
+class _CollectorServer(ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, logger: BaseLogger) -> None:
+        self.logger = logger
+        super().__init__(socket_path, _CollectorRequestHandler)
+
+
+class LogCollector:
+    """汇总多个进程的日志记录，并通过同一个日志记录器保存。
+
+    适用于多 worker 部署：在主进程中启动 LogCollector，各 worker 的日志记录器
+    指定 collector_socket 后，记录将发送到该进程，而非各自连接数据库。
+
+    传入的日志记录器应使用批量保存模式，以合并多个进程的写入。
+    """
+
+    def __init__(self, logger: BaseLogger, socket_path: str, /) -> None:
+        self._logger = logger
+        self._socket_path = socket_path
+        self._server: _CollectorServer | None = None
+        self._thread: Thread | None = None
+
+    def start(self) -> None:
+        """在后台线程中开始接收日志记录。"""
+        if self._server is not None:
+            return
+
+        # 清理上次运行遗留的 Socket 文件
+        Path(self._socket_path).unlink(missing_ok=True)
+
+        self._server = _CollectorServer(self._socket_path, self._logger)
+        self._thread = Thread(
+            target=self._server.serve_forever,
+            name="sshared-log-collector",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        """停止接收日志记录并删除 Socket 文件。"""
+        if self._server is None:
+            return
+
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        Path(self._socket_path).unlink(missing_ok=True)
@@ -15,3 +15,8 @@ LOG_LEVEL_CONFIG: dict[LogLevelType, LogLevelConfigItem] = {
     "ERROR": LogLevelConfigItem(num=4, color="RED"),
     "FATAL": LogLevelConfigItem(num=5, color="MAGENTA"),
 }
+
+# 预先创建的未来分区数量
+PARTITION_PREMAKE = 3
+# 分区维护间隔（秒）
+PARTITION_MAINTENANCE_INTERVAL = 3600
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import re
+from atexit import register as atexit_register
+from datetime import datetime
+from pathlib import Path
+from threading import Event, Lock, Thread
+from time import time
+
+from msgspec import DecodeError
+from msgspec.json import Decoder, Encoder
+
+from sshared.logging.record import Record
+
+
+class FileSink:
+    """以 JSON Lines 格式将日志记录写入文件。
+
+    记录先编码到内存缓冲区，超过 buffer_size 字节或每隔 flush_interval 秒统一写入一次。
+
+    文件大小超过 max_bytes，或距上次轮转超过 rotate_interval 秒时进行轮转，
+    当前文件被重命名为 {stem}.{轮转时间}{suffix}，之后写入新文件。
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        /,
+        *,
+        max_bytes: int | None = 128 * 1024 * 1024,
+        rotate_interval: float | None = None,
+        buffer_size: int = 256 * 1024,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self._path = Path(path)
+        self._max_bytes = max_bytes
+        self._rotate_interval = rotate_interval
+        self._buffer_size = buffer_size
+        self._flush_interval = flush_interval
+
+        self._encoder = Encoder()
+        self._pending = bytearray()
+
+        self._lock = Lock()
+        self._file = self._path.open("ab", buffering=0)
+        self._file_size = self._file.tell()
+        self._next_rotate_at = (
+            time() + rotate_interval if rotate_interval is not None else None
+        )
+
+        self._flusher: Thread | None = None
+        self._flusher_stop = Event()
+        atexit_register(self.close)
+
+    def _rotate(self) -> None:
+        """轮转日志文件，调用方需持有锁。"""
+        self._file.close()
+
+        # 文件名包含微秒，保证按文件名排序即为轮转顺序
+        rotated_at = datetime.now().strftime(r"%Y%m%d-%H%M%S-%f")
+        target = self._path.with_name(
+            f"{self._path.stem}.{rotated_at}{self._path.suffix}"
+        )
+        self._path.rename(target)
+
+        self._file = self._path.open("ab", buffering=0)
+        self._file_size = 0
+        if self._rotate_interval is not None:
+            self._next_rotate_at = time() + self._rotate_interval
+
+    def _flush_pending(self) -> None:
+        """将缓冲区内容写入文件，调用方需持有锁。"""
+        if not self._pending:
+            return
+
+        if (
+            self._max_bytes is not None
+            and self._file_size > 0
+            and self._file_size + len(self._pending) > self._max_bytes
+        ) or (self._next_rotate_at is not None and time() >= self._next_rotate_at):
+            self._rotate()
+
+        self._file.write(self._pending)
+        self._file_size += len(self._pending)
+        self._pending.clear()
+
+    def _run_flusher(self) -> None:
+        while not self._flusher_stop.wait(self._flush_interval):
+            self.flush()
+
+    def write(self, record: Record, /) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+
+            self._encoder.encode_into(record, self._pending, -1)
+            self._pending.extend(b"\n")
+
+            if len(self._pending) >= self._buffer_size:
+                self._flush_pending()
+
+            # 首次写入时启动定时写入线程
+            if self._flusher is None:
+                self._flusher = Thread(
+                    target=self._run_flusher,
+                    name="sshared-log-file-flusher",
+                    daemon=True,
+                )
+                self._flusher.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._flush_pending()
+
+    def close(self) -> None:
+        """停止定时写入线程，写入缓冲区中的剩余内容并关闭文件。"""
+        self._flusher_stop.set()
+        with self._lock:
+            if self._file.closed:
+                return
+
+            self._flush_pending()
+            self._file.close()
+
+    def get_rotated_files(self) -> list[Path]:
+        """获取已轮转的日志文件，按轮转时间升序排列。"""
+        return get_rotated_files(self._path)
+
+
+def get_rotated_files(path: str | Path, /) -> list[Path]:
+    """获取指定日志文件已轮转的文件，按轮转时间升序排列。
+
+    仅匹配 {stem}.{轮转时间}{suffix} 形式的文件名，
+    不包含同目录下其它日志文件（如 app.worker2.jsonl）。
+    """
+    path = Path(path)
+    pattern = re.compile(
+        rf"{re.escape(path.stem)}\.\d{{8}}-\d{{6}}-\d{{6}}{re.escape(path.suffix)}"
+    )
+    return sorted(x for x in path.parent.iterdir() if pattern.fullmatch(x.name))
+
+
+def load_log_file(
+    path: str | Path,
+    /,
+    *,
+    connection_string: str,
+    table: str,
+    delete: bool = True,
+) -> int:
+    """使用 COPY 将 JSON Lines 日志文件导入数据库，返回导入的记录数量。
+
+    无法解析的行（如进程崩溃时写入不完整的最后一行）将被跳过。
+    导入在单个事务中完成，delete 为 True 时，导入成功后删除该文件。
+    """
+    from psycopg import Connection
+
+    from sshared.logging.schema import (
+        get_copy_statement,
+        get_init_statements,
+        record_to_row,
+    )
+    from sshared.postgres import enhance_json_process
+
+    enhance_json_process()
+
+    path = Path(path)
+    decoder = Decoder(Record)
+    count = 0
+
+    with Connection.connect(connection_string) as conn:
+        for statement in get_init_statements(table):
+            conn.execute(statement)
+
+        with path.open("rb") as f, conn.cursor() as cursor:  # noqa: SIM117
+            with cursor.copy(get_copy_statement(table)) as copy:
+                for line in f:
+                    try:
+                        record = decoder.decode(line)
+                    except DecodeError:
+                        continue
+
+                    copy.write_row(record_to_row(record))
+                    count += 1
+
+    if delete:
+        path.unlink()
+
+    return count
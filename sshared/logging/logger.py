@@ -1,196 +1,312 @@
 from __future__ import annotations
 
-from datetime import datetime
-
-from sshared.logging.config import LOG_LEVEL_CONFIG
-from sshared.logging.record import ExceptionField, ExceptionStackField, Record
-from sshared.logging.types import ExtraType, LogLevelType
-from sshared.terminal.color import fg_color
-from sshared.terminal.exception import get_exception_stack
+import sys
+from collections.abc import Generator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from threading import Event, Thread
+from typing import TYPE_CHECKING, Literal
+
+from sshared.logging.base import BaseLogger
+from sshared.logging.buffer import LogBufferStats
+from sshared.logging.config import PARTITION_MAINTENANCE_INTERVAL, PARTITION_PREMAKE
+from sshared.logging.file_sink import FileSink
+from sshared.logging.rate_limit import RateLimitRule
+from sshared.logging.record import Record
+from sshared.logging.terminal_sink import TerminalSink
+from sshared.logging.types import (
+    LogLevelType,
+    OverflowPolicyType,
+    PartitionIntervalType,
+)
+from sshared.logging.writer import BatchWriter
+from sshared.terminal.exception import pretty_exception
+
+if TYPE_CHECKING:
+    from psycopg import Connection
+
+    from sshared.logging.collector import CollectorSender
+    from sshared.postgres.connection_manager import SyncConnectionManager
+    from sshared.postgres.sync_pool import SyncPool
 
 
 class LoggerInitError(Exception):
     pass
 
 
-class Logger:
-    def __init__(
+class Logger(BaseLogger):
+    """同步日志记录器。
+
+    指定 pool 时通过该连接池保存日志，可与其它代码共享连接，
+    否则使用 connection_string 创建独立的连接。
+    """
+
+    def __init__(  # noqa: PLR0913
         self,
         display_level: LogLevelType = "DEBUG",
         save_level: LogLevelType = "DEBUG",
         connection_string: str | None = None,
         table: str | None = None,
+        *,
+        save_mode: Literal["SYNC", "BATCH"] = "SYNC",
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        buffer_size: int = 10000,
+        overflow_policy: OverflowPolicyType = "DROP_OLDEST",
+        block_timeout: float = 0.1,
+        terminal_sink: TerminalSink | None = None,
+        file_sink: FileSink | None = None,
+        rate_limits: dict[LogLevelType, RateLimitRule] | None = None,
+        dedup_exceptions: bool = False,
+        partition_interval: PartitionIntervalType | None = None,
+        retention: timedelta | None = None,
+        collector_socket: str | None = None,
+        pool: SyncPool | None = None,
     ) -> None:
-        self._display_level_num = LOG_LEVEL_CONFIG[display_level].num
-        self._save_level_num = LOG_LEVEL_CONFIG[save_level].num
-
-        if connection_string and table:
-            from psycopg import sql
-
+        super().__init__(
+            display_level,
+            save_level,
+            save_enabled=bool((connection_string or pool) and table)
+            or bool(collector_socket),
+            terminal_sink=terminal_sink,
+            file_sink=file_sink,
+            rate_limits=rate_limits,
+        )
+        self._writer: BatchWriter | None = None
+        self._partition_interval: PartitionIntervalType | None = partition_interval
+        self._retention = retention
+        self._partition_maintainer: Thread | None = None
+        self._partition_maintainer_stop = Event()
+        self._collector_sender: CollectorSender | None = None
+        self._connection_manager: SyncConnectionManager | None = None
+        self._pool: SyncPool | None = None
+
+        # 指定汇总进程时，日志记录发送到汇总进程，不直接连接数据库
+        if collector_socket:
+            from sshared.logging.collector import CollectorSender
+
+            self._collector_sender = CollectorSender(collector_socket)
+            self._writer = BatchWriter(
+                self._collector_sender.send,
+                batch_size=batch_size,
+                flush_interval=flush_interval,
+                buffer_size=buffer_size,
+                overflow_policy=overflow_policy,
+                block_timeout=block_timeout,
+            )
+        elif (connection_string or pool) and table:
+            from sshared.logging.schema import (
+                get_copy_statement,
+                get_exception_upsert_statement,
+                get_insert_statement,
+            )
             from sshared.postgres.connection_manager import SyncConnectionManager
 
-            self._connection_manager = SyncConnectionManager(connection_string)
-            self._insert_statement = sql.SQL(
-                "INSERT INTO {} (time, level, msg, extra, exception) "
-                "VALUES (%s, %s, %s, %s, %s);"
-            ).format(sql.Identifier(table))
-            self._init_db(table)
-        else:
-            self._connection_manager = None
-
-    def _init_db(self, table: str) -> None:
-        from psycopg import sql
+            if pool is not None:
+                self._pool = pool
+            else:
+                self._connection_manager = SyncConnectionManager(connection_string)  # type: ignore
+            self._dedup_exceptions = dedup_exceptions
+            self._insert_statement = get_insert_statement(
+                table, dedup_exceptions=dedup_exceptions
+            )
+            self._copy_statement = get_copy_statement(
+                table, dedup_exceptions=dedup_exceptions
+            )
+            self._exception_upsert_statement = get_exception_upsert_statement(table)
+            self._table = table
+            self._db_initialized = False
+
+            # 批量保存模式下，数据库初始化在写入线程中进行
+            # 避免数据库不可用时阻塞调用方
+            if save_mode == "SYNC":
+                # 数据库不可用时等待，使应用可以先于数据库启动
+                self._init_db(table, wait=True)
+            else:
+                from sshared.logging.writer import get_unavailable_delay
+
+                self._writer = BatchWriter(
+                    self._save_batch,
+                    batch_size=batch_size,
+                    flush_interval=flush_interval,
+                    buffer_size=buffer_size,
+                    overflow_policy=overflow_policy,
+                    block_timeout=block_timeout,
+                    retry_delay=get_unavailable_delay,
+                )
 
-        from sshared.postgres import enhance_json_process
+    @contextmanager
+    def _get_conn(self, *, wait: bool = False) -> Generator[Connection]:
+        # 使用连接池时忽略 wait，由调用方通过连接池的 prepare 等待数据库就绪
+        if self._pool is not None:
+            # 不复用调用方在当前线程中取出的连接，避免日志写入进入调用方的事务
+            # 调用方的事务失败或回滚时，日志记录也会丢失
+            with self._pool.get_conn(reuse_thread_conn=False) as conn:
+                yield conn
+            return
 
         if self._connection_manager is None:
             raise LoggerInitError("未设置 Connection String，无法将日志保存到数据库")
 
-        enhance_json_process()
-
-        conn = self._connection_manager.get_conn()
-
-        conn.execute(
-            """
-            DO $$
-            BEGIN
-                IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'enum_logs_level') THEN
-                    CREATE TYPE enum_logs_level AS ENUM ('DEBUG', 'INFO', 'WARN', 'ERROR', 'FATAL');
-                END IF;
-            END
-            $$;
-            """  # noqa: E501
-        )
+        yield self._connection_manager.get_conn(wait=wait)
 
-        conn.execute(
-            sql.SQL("""
-            CREATE TABLE IF NOT EXISTS {} (
-                id serial PRIMARY KEY,
-                time TIMESTAMP NOT NULL,
-                level enum_logs_level NOT NULL,
-                msg TEXT NOT NULL,
-                extra JSONB,
-                exception JSONB
-            )
-            """).format(sql.Identifier(table))
-        )
-
-    def _print(self, record: Record) -> None:
-        main_string: list[str] = [
-            record.time.strftime(r"%y-%m-%d %H:%M:%S"),
-            fg_color(f"{record.level:<5}", LOG_LEVEL_CONFIG[record.level].color),
-            record.msg,
-        ]
+    def _init_db(self, table: str, *, wait: bool = False) -> None:
+        from sshared.logging.schema import get_init_statements
+        from sshared.postgres import enhance_json_process
 
-        if record.extra:
-            main_string.extend(f"{key}={value}" for key, value in record.extra.items())
+        enhance_json_process()
 
-        print(" ".join(main_string))  # noqa: T201
+        with self._get_conn(wait=wait) as conn:
+            for statement in get_init_statements(
+                table,
+                dedup_exceptions=self._dedup_exceptions,
+                partition_interval=self._partition_interval,
+            ):
+                conn.execute(statement)
+
+        if self._partition_interval is not None:
+            # 写入前需要确保当前分区已存在，之后由后台线程定期维护
+            self._maintain_partitions()
+            if self._partition_maintainer is None:
+                self._partition_maintainer = Thread(
+                    target=self._run_partition_maintainer,
+                    name="sshared-log-partition-maintainer",
+                    daemon=True,
+                )
+                self._partition_maintainer.start()
 
-        if record.exception:
-            exception_string: list[str] = [
-                fg_color("Exception", "RED"),
-                f"{record.exception.name}({record.exception.desc})",
-            ]
+        self._db_initialized = True
 
-            if record.exception.stack:
-                for x in record.exception.stack:
-                    exception_string.extend(
-                        [
-                            "\n    ",
-                            f"at {x.file_name}:{x.line_number} ->",
-                            f"{x.func_name} -> {x.line}",
-                        ]
-                    )
+    def _maintain_partitions(self) -> None:
+        """创建未来的分区，并删除超出保留期限的分区。"""
+        from sshared.logging.schema import (
+            get_create_partition_statements,
+            get_drop_partition_statements,
+            get_list_partitions_statement,
+        )
 
-            print(  # noqa: T201
-                "                 ",  # 首行缩进
-                " ".join(
-                    # 对每一行进行缩进
-                    x.replace("\n", "\n               ")
-                    for x in exception_string
-                ),
-            )
+        if self._partition_interval is None:
+            return
 
-    def _save(self, record: Record) -> None:
-        from psycopg.types.json import Jsonb
+        now = datetime.now()
 
-        if self._connection_manager is None:
-            raise LoggerInitError("未设置 Connection String，无法将日志保存到数据库")
+        with self._get_conn() as conn:
+            for statement in get_create_partition_statements(
+                self._table,
+                interval=self._partition_interval,
+                now=now,
+                premake=PARTITION_PREMAKE,
+            ):
+                conn.execute(statement)
 
-        self._connection_manager.get_conn().execute(
-            self._insert_statement,
-            (
-                record.time,
-                record.level,
-                record.msg,
-                Jsonb(record.extra) if record.extra else None,
-                Jsonb(record.exception) if record.exception else None,
-            ),
-            prepare=True,
-        )
+            if self._retention is None:
+                return
 
-    def _log(
-        self,
-        msg: str,
-        /,
-        *,
-        level: LogLevelType,
-        exception: Exception | None,
-        **kwargs: ExtraType,
-    ) -> None:
-        exc_stack = get_exception_stack(exception) if exception else None
-
-        record = Record(
-            time=datetime.now(),
-            level=level,
-            msg=msg,
-            extra=kwargs if kwargs else None,
-            exception=ExceptionField(
-                name=type(exception).__name__,
-                desc=repr(exception.args[0]) if len(exception.args) else None,
-                stack=tuple(
-                    ExceptionStackField(
-                        file_name=item.file_name,
-                        line_number=item.line_number,
-                        func_name=item.func_name,
-                        line=item.line,
-                    )
-                    for item in exc_stack
+            partitions = [
+                x[0] for x in conn.execute(get_list_partitions_statement(self._table))
+            ]
+            for statement in get_drop_partition_statements(
+                self._table,
+                partitions,
+                interval=self._partition_interval,
+                now=now,
+                retention=self._retention,
+            ):
+                conn.execute(statement)
+
+    def _run_partition_maintainer(self) -> None:
+        while not self._partition_maintainer_stop.wait(PARTITION_MAINTENANCE_INTERVAL):
+            try:
+                self._maintain_partitions()
+            except Exception as e:
+                # 维护失败时不能再通过日志记录器报告，否则可能陷入循环
+                print(  # noqa: T201
+                    f"日志表分区维护失败\n{pretty_exception(e)}", file=sys.stderr
                 )
-                if exc_stack
-                else None,
-            )
-            if exception
-            else None,
-        ).validate()
 
-        if LOG_LEVEL_CONFIG[level].num >= self._display_level_num:
-            self._print(record)
+    def _save_exceptions(
+        self, conn: Connection, records: list[Record]
+    ) -> list[int | None]:
+        """写入记录中的异常堆栈，返回每条记录对应的异常 ID。"""
+        from sshared.logging.schema import group_exceptions
 
-        if (
-            LOG_LEVEL_CONFIG[level].num >= self._save_level_num
-            and self._connection_manager is not None
-        ):
-            self._save(record)
+        fingerprints, params = group_exceptions(records)
+        if not params:
+            return [None] * len(records)
 
-    def debug(self, msg: str, /, **kwargs: ExtraType) -> None:
-        self._log(msg, level="DEBUG", exception=None, **kwargs)
+        exception_ids: dict[str, int] = {}
+        with conn.cursor() as cursor:
+            cursor.executemany(self._exception_upsert_statement, params, returning=True)
+            # 每组参数对应一个结果集，顺序与参数顺序相同
+            for fingerprint, *_ in params:
+                exception_ids[fingerprint] = cursor.fetchone()[0]  # type: ignore
+                cursor.nextset()
 
-    def info(self, msg: str, /, **kwargs: ExtraType) -> None:
-        self._log(msg, level="INFO", exception=None, **kwargs)
-
-    def warn(
-        self, msg: str, /, *, exception: Exception | None = None, **kwargs: ExtraType
-    ) -> None:
-        self._log(msg, level="WARN", exception=exception, **kwargs)
+        return [exception_ids[x] if x else None for x in fingerprints]
 
-    def error(
-        self, msg: str, /, *, exception: Exception | None = None, **kwargs: ExtraType
-    ) -> None:
-        self._log(msg, level="ERROR", exception=exception, **kwargs)
+    def _save(self, record: Record) -> None:
+        from psycopg import Error
+
+        from sshared.logging.schema import record_to_dedup_row, record_to_row
+        from sshared.postgres import CircuitOpenError, PoolTimeoutError
+
+        if self._writer is not None:
+            self._writer.put(record)
+            return
+
+        try:
+            with self._get_conn() as conn:
+                if self._dedup_exceptions:
+                    (exception_id,) = self._save_exceptions(conn, [record])
+                    row = record_to_dedup_row(record, exception_id)
+                else:
+                    row = record_to_row(record)
+
+                conn.execute(self._insert_statement, row, prepare=True)
+        except (CircuitOpenError, PoolTimeoutError, Error) as e:
+            # 数据库不可用或写入失败时丢弃记录，避免日志调用抛出异常
+            # 连接池中未检测的连接可能已在数据库重启后断开
+            print(  # noqa: T201
+                f"数据库不可用或写入失败，日志未保存\n{pretty_exception(e)}",
+                file=sys.stderr,
+            )
 
-    def fatal(
-        self, msg: str, /, *, exception: Exception | None = None, **kwargs: ExtraType
-    ) -> None:
-        self._log(msg, level="FATAL", exception=exception, **kwargs)
+    def _save_batch(self, records: list[Record]) -> None:
+        from sshared.logging.schema import record_to_dedup_row, record_to_row
+
+        if not self._db_initialized:
+            self._init_db(self._table)
+
+        with self._get_conn() as conn:
+            if self._dedup_exceptions:
+                exception_ids = self._save_exceptions(conn, records)
+                rows = map(record_to_dedup_row, records, exception_ids)
+            else:
+                rows = map(record_to_row, records)
+
+            with conn.cursor() as cursor, cursor.copy(self._copy_statement) as copy:
+                for row in rows:
+                    copy.write_row(row)
+
+    @property
+    def buffer_stats(self) -> LogBufferStats | None:
+        """批量保存模式下缓冲区的待写入、已丢弃和写入失败记录数量。
+
+        非批量保存模式下返回 None。
+        """
+        if self._writer is None:
+            return None
+
+        return self._writer.stats
+
+    def close(self) -> None:
+        """写入所有尚未保存的日志记录，并停止分区维护线程。
+
+        批量保存模式下，进程退出时会自动写入尚未保存的日志记录。
+        """
+        self._emit_suppressed_summaries(force=True)
+        self._partition_maintainer_stop.set()
+        if self._writer is not None:
+            self._writer.close()
+        if self._collector_sender is not None:
+            self._collector_sender.close()
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from msgspec.json import Decoder
+
+from sshared.logging.record import Record
+from sshared.logging.types import ExtraType, LogLevelType
+from sshared.strict_struct import NonEmptyStr, PositiveInt, StrictFrozenStruct
+
+if TYPE_CHECKING:
+    from psycopg import AsyncConnection, Connection, sql
+
+_DECODER = Decoder(Record)
+
+
+class LogFilter(StrictFrozenStruct, frozen=True, eq=False, gc=False):
+    # 时间范围，左闭右开
+    start: datetime | None = None
+    end: datetime | None = None
+    levels: tuple[LogLevelType, ...] | None = None
+    # 仅返回 extra 字段包含所有指定键值对的记录
+    extra: dict[NonEmptyStr, ExtraType] | None = None
+
+
+class LogCursor(StrictFrozenStruct, frozen=True, eq=False, gc=False):
+    time: datetime
+    id: PositiveInt
+
+
+class LogPage(StrictFrozenStruct, frozen=True, eq=False, gc=False):
+    records: tuple[Record, ...]
+    # 没有下一页时为 None
+    next_cursor: LogCursor | None
+
+
+def _get_query_statement(  # noqa: PLR0913
+    table: str,
+    log_filter: LogFilter | None,
+    *,
+    after: LogCursor | None,
+    descending: bool,
+    limit: int | None,
+    dedup_exceptions: bool,
+) -> tuple[sql.Composed, list]:
+    from sshared.logging.schema import get_query_statement
+
+    log_filter = log_filter or LogFilter()
+    return get_query_statement(
+        table,
+        start=log_filter.start,
+        end=log_filter.end,
+        levels=log_filter.levels,
+        extra=log_filter.extra,
+        after=(after.time, after.id) if after else None,
+        descending=descending,
+        limit=limit,
+        dedup_exceptions=dedup_exceptions,
+    )
+
+
+def _to_page(rows: list[tuple[datetime, int, str]], limit: int) -> LogPage:
+    records = tuple(_DECODER.decode(x[2]) for x in rows)
+    if len(rows) < limit:
+        return LogPage(records=records, next_cursor=None)
+
+    time, id, _ = rows[-1]
+    return LogPage(records=records, next_cursor=LogCursor(time=time, id=id))
+
+
+def stream_logs(  # noqa: PLR0913
+    conn: Connection,
+    table: str,
+    log_filter: LogFilter | None = None,
+    /,
+    *,
+    descending: bool = False,
+    dedup_exceptions: bool = False,
+    batch_size: int = 1000,
+) -> Iterator[Record]:
+    """使用服务端游标逐条返回符合条件的日志记录，按时间排序。
+
+    每次从数据库获取 batch_size 条记录，内存占用与结果总数无关。
+    迭代完成前，连接处于事务中，不能用于其它查询。
+    """
+    from sshared.postgres.stream import stream_rows
+
+    statement, params = _get_query_statement(
+        table,
+        log_filter,
+        after=None,
+        descending=descending,
+        limit=None,
+        dedup_exceptions=dedup_exceptions,
+    )
+
+    for _, _, data in stream_rows(
+        conn, statement, params, name="sshared_log_query", batch_size=batch_size
+    ):
+        yield _DECODER.decode(data)
+
+
+async def astream_logs(  # noqa: PLR0913
+    conn: AsyncConnection,
+    table: str,
+    log_filter: LogFilter | None = None,
+    /,
+    *,
+    descending: bool = False,
+    dedup_exceptions: bool = False,
+    batch_size: int = 1000,
+) -> AsyncIterator[Record]:
+    """stream_logs 的 asyncio 版本。"""
+    from sshared.postgres.stream import astream_rows
+
+    statement, params = _get_query_statement(
+        table,
+        log_filter,
+        after=None,
+        descending=descending,
+        limit=None,
+        dedup_exceptions=dedup_exceptions,
+    )
+
+    async for _, _, data in astream_rows(
+        conn, statement, params, name="sshared_log_query", batch_size=batch_size
+    ):
+        yield _DECODER.decode(data)
+
+
+def fetch_log_page(  # noqa: PLR0913
+    conn: Connection,
+    table: str,
+    log_filter: LogFilter | None = None,
+    /,
+    *,
+    after: LogCursor | None = None,
+    limit: int = 100,
+    descending: bool = False,
+    dedup_exceptions: bool = False,
+) -> LogPage:
+    """获取一页符合条件的日志记录，按时间排序。
+
+    after 为上一页的 next_cursor，使用键集分页，翻页开销与页码无关。
+    """
+    statement, params = _get_query_statement(
+        table,
+        log_filter,
+        after=after,
+        descending=descending,
+        limit=limit,
+        dedup_exceptions=dedup_exceptions,
+    )
+
+    return _to_page(conn.execute(statement, params).fetchall(), limit)
+
+
+async def afetch_log_page(  # noqa: PLR0913
+    conn: AsyncConnection,
+    table: str,
+    log_filter: LogFilter | None = None,
+    /,
+    *,
+    after: LogCursor | None = None,
+    limit: int = 100,
+    descending: bool = False,
+    dedup_exceptions: bool = False,
+) -> LogPage:
+    """fetch_log_page 的 asyncio 版本。"""
+    statement, params = _get_query_statement(
+        table,
+        log_filter,
+        after=after,
+        descending=descending,
+        limit=limit,
+        dedup_exceptions=dedup_exceptions,
+    )
+
+    cursor = await conn.execute(statement, params)
+    return _to_page(await cursor.fetchall(), limit)
+
+
+def create_query_indexes(
+    conn: Connection, table: str, /, *, partitioned: bool = False
+) -> None:
+    """创建加速日志查询的索引，可重复执行。
+
+    默认不创建这些索引，因为它们会增加写入开销。
+    非分区表上的索引使用 CONCURRENTLY 创建，连接需处于自动提交模式。
+    """
+    from sshared.logging.schema import get_query_index_statements
+
+    for statement in get_query_index_statements(table, partitioned=partitioned):
+        conn.execute(statement)
+
+
+async def acreate_query_indexes(
+    conn: AsyncConnection, table: str, /, *, partitioned: bool = False
+) -> None:
+    """create_query_indexes 的 asyncio 版本。"""
+    from sshared.logging.schema import get_query_index_statements
+
+    for statement in get_query_index_statements(table, partitioned=partitioned):
+        await conn.execute(statement)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from random import random
+from threading import Lock
+from time import monotonic
+
+from sshared.logging.types import LogLevelType
+from sshared.strict_struct import (
+    Percentage,
+    PositiveFloat,
+    PositiveInt,
+    StrictFrozenStruct,
+)
+
+
+class RateLimitRule(StrictFrozenStruct, frozen=True, eq=False, gc=False):
+    # 每秒补充的令牌数量
+    rate: PositiveFloat
+    # 令牌桶容量，即允许的突发数量
+    burst: PositiveInt
+    # 通过限流后，记录被保留的概率
+    sample_rate: Percentage = 1.0
+
+
+class _Bucket:
+    __slots__ = ("suppressed", "tokens", "updated_at")
+
+    def __init__(self, tokens: float, updated_at: float) -> None:
+        self.tokens = tokens
+        self.updated_at = updated_at
+        self.suppressed = 0
+
+
+class RateLimiter:
+    """按等级与日志内容对日志进行限流和采样。
+
+    每个（等级，日志内容）组合拥有独立的令牌桶，未配置规则的等级不受限制。
+    最多跟踪 max_keys 个组合，超出时淘汰最久未使用的组合。
+
+    被抑制的数量在该组合再次通过时报告；不再出现或被淘汰的组合，
+    由 take_summaries 每隔 summary_interval 秒或在淘汰后报告。
+    """
+
+    def __init__(
+        self,
+        rules: dict[LogLevelType, RateLimitRule],
+        /,
+        *,
+        max_keys: int = 10000,
+        summary_interval: float = 60.0,
+    ) -> None:
+        self._rules = rules
+        self._max_keys = max_keys
+        self._summary_interval = summary_interval
+
+        self._buckets: OrderedDict[tuple[LogLevelType, str], _Bucket] = OrderedDict()
+        # 被淘汰时仍有抑制数量的组合，等待下次汇总时报告
+        self._evicted: list[tuple[LogLevelType, str, int]] = []
+        self._next_summary_at = monotonic() + summary_interval
+        self._lock = Lock()
+
+    def acquire(self, level: LogLevelType, msg: str, /) -> tuple[bool, int]:
+        """判断记录是否允许通过。
+
+        返回是否允许通过，以及允许通过时，该组合自上次通过后被抑制的记录数量。
+        """
+        rule = self._rules.get(level)
+        if rule is None:
+            return True, 0
+
+        key = (level, msg)
+        now = monotonic()
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = _Bucket(rule.burst, now)
+                self._buckets[key] = bucket
+                if len(self._buckets) > self._max_keys:
+                    (evicted_level, evicted_msg), evicted = self._buckets.popitem(
+                        last=False
+                    )
+                    if evicted.suppressed:
+                        self._evicted.append(
+                            (evicted_level, evicted_msg, evicted.suppressed)
+                        )
+            else:
+                self._buckets.move_to_end(key)
+                bucket.tokens = min(
+                    rule.burst, bucket.tokens + (now - bucket.updated_at) * rule.rate
+                )
+                bucket.updated_at = now
+
+            if bucket.tokens < 1 or (
+                rule.sample_rate < 1 and random() >= rule.sample_rate
+            ):
+                bucket.suppressed += 1
+                return False, 0
+
+            bucket.tokens -= 1
+            suppressed = bucket.suppressed
+            bucket.suppressed = 0
+
+            return True, suppressed
+
+    def take_summaries(
+        self, *, force: bool = False
+    ) -> list[tuple[LogLevelType, str, int]]:
+        """取出待报告的（等级，日志内容，抑制数量），并清零已报告的数量。
+
+        包括已被淘汰的组合；距上次汇总超过 summary_interval 秒或 force 为 True 时，
+        还包括所有仍在跟踪的组合。
+        """
+        now = monotonic()
+        # 大多数调用无需汇总，不获取锁直接返回
+        if not force and not self._evicted and now < self._next_summary_at:
+            return []
+
+        with self._lock:
+            summaries, self._evicted = self._evicted, []
+            if not force and now < self._next_summary_at:
+                return summaries
+
+            self._next_summary_at = now + self._summary_interval
+            for (level, msg), bucket in self._buckets.items():
+                if bucket.suppressed:
+                    summaries.append((level, msg, bucket.suppressed))
+                    bucket.suppressed = 0
+
+        return summaries
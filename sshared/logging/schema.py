@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from hashlib import blake2b
+
+from psycopg import sql
+from psycopg.types.json import Jsonb
+
+from sshared.logging.record import ExceptionField, Record
+from sshared.logging.types import ExtraType, LogLevelType, PartitionIntervalType
+
+_COLUMNS = sql.SQL("time, level, msg, extra, exception")
+_DEDUP_COLUMNS = sql.SQL("time, level, msg, extra, exception_id, exception_desc")
+
+
+def get_exceptions_table(table: str) -> str:
+    """获取异常去重模式下，存储异常堆栈的表名。"""
+    return f"{table}_exceptions"
+
+
+def get_init_statements(
+    table: str,
+    *,
+    dedup_exceptions: bool = False,
+    partition_interval: PartitionIntervalType | None = None,
+) -> tuple[sql.SQL | sql.Composed, ...]:
+    """获取创建日志表所需的语句，可重复执行。
+
+    指定 partition_interval 时，日志表按时间范围分区，并在时间与等级上创建索引，
+    分区需通过 get_create_partition_statements 创建。
+
+    日志查询所需的索引不在此创建，见 get_query_index_statements。
+    """
+    statements: list[sql.SQL | sql.Composed] = [
+        sql.SQL(
+            """
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'enum_logs_level') THEN
+                    CREATE TYPE enum_logs_level AS ENUM ('DEBUG', 'INFO', 'WARN', 'ERROR', 'FATAL');
+                END IF;
+            END
+            $$;
+            """  # noqa: E501
+        ),
+    ]
+
+    if partition_interval is None:
+        statements.append(
+            sql.SQL("""
+            CREATE TABLE IF NOT EXISTS {} (
+                id serial PRIMARY KEY,
+                time TIMESTAMP NOT NULL,
+                level enum_logs_level NOT NULL,
+                msg TEXT NOT NULL,
+                extra JSONB,
+                exception JSONB
+            )
+            """).format(sql.Identifier(table))
+        )
+    else:
+        # 分区表的主键必须包含分区键
+        # 日志按时间顺序写入，BRIN 索引体积小且适合时间范围查询
+        statements.extend(
+            (
+                sql.SQL("""
+                CREATE TABLE IF NOT EXISTS {} (
+                    id bigserial,
+                    time TIMESTAMP NOT NULL,
+                    level enum_logs_level NOT NULL,
+                    msg TEXT NOT NULL,
+                    extra JSONB,
+                    exception JSONB,
+                    PRIMARY KEY (id, time)
+                ) PARTITION BY RANGE (time)
+                """).format(sql.Identifier(table)),
+                sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} USING BRIN (time)").format(
+                    sql.Identifier(f"{table}_time_brin_idx"), sql.Identifier(table)
+                ),
+                sql.SQL("CREATE INDEX IF NOT EXISTS {} ON {} (level, time)").format(
+                    sql.Identifier(f"{table}_level_time_idx"), sql.Identifier(table)
+                ),
+            )
+        )
+
+    if dedup_exceptions:
+        # 每种异常堆栈只保存一次，日志表中仅记录异常 ID 与描述
+        # 为保证写入性能，不创建外键约束
+        statements.extend(
+            (
+                sql.SQL("""
+                CREATE TABLE IF NOT EXISTS {} (
+                    id serial PRIMARY KEY,
+                    fingerprint TEXT NOT NULL UNIQUE,
+                    name TEXT NOT NULL,
+                    stack JSONB,
+                    occurrences BIGINT NOT NULL,
+                    first_seen TIMESTAMP NOT NULL,
+                    last_seen TIMESTAMP NOT NULL
+                )
+                """).format(sql.Identifier(get_exceptions_table(table))),
+                sql.SQL(
+                    "ALTER TABLE {} "
+                    "ADD COLUMN IF NOT EXISTS exception_id INTEGER, "
+                    "ADD COLUMN IF NOT EXISTS exception_desc TEXT"
+                ).format(sql.Identifier(table)),
+            )
+        )
+
+    return tuple(statements)
+
+
+def get_query_index_statements(
+    table: str, *, partitioned: bool = False
+) -> tuple[sql.Composed, ...]:
+    """获取加速日志查询的索引的创建语句，可重复执行。
+
+    (time, id) 索引用于按时间范围查询与按 (time, id) 顺序的键集分页。
+    extra 字段上的 GIN 索引用于按键值对筛选日志，会增加写入开销。
+    非分区表使用 CONCURRENTLY 创建，不阻塞写入，但不能在事务中执行；
+    分区表不支持 CONCURRENTLY，直接创建，并自动应用于所有分区。
+    """
+    concurrently = sql.SQL("") if partitioned else sql.SQL("CONCURRENTLY ")
+    statements: list[sql.Composed] = [
+        # 分区表上的 BRIN 与 (level, time) 索引无法按 (time, id) 顺序返回记录
+        sql.SQL("CREATE INDEX {}IF NOT EXISTS {} ON {} (time, id)").format(
+            concurrently,
+            sql.Identifier(f"{table}_time_id_idx"),
+            sql.Identifier(table),
+        )
+    ]
+
+    # jsonb_path_ops 仅支持包含查询，但体积更小、写入更快
+    statements.append(
+        sql.SQL(
+            "CREATE INDEX {}IF NOT EXISTS {} ON {} USING GIN (extra jsonb_path_ops)"
+        ).format(
+            concurrently,
+            sql.Identifier(f"{table}_extra_gin_idx"),
+            sql.Identifier(table),
+        )
+    )
+
+    return tuple(statements)
+
+
+def get_partition_range(
+    time: datetime, interval: PartitionIntervalType
+) -> tuple[datetime, datetime]:
+    """获取指定时间所在分区的时间范围，左闭右开。"""
+    start = datetime(time.year, time.month, time.day)
+
+    if interval == "DAY":
+        return start, start + timedelta(days=1)
+    if interval == "WEEK":
+        start -= timedelta(days=start.weekday())
+        return start, start + timedelta(days=7)
+
+    start = start.replace(day=1)
+    if start.month == 12:  # noqa: PLR2004
+        return start, start.replace(year=start.year + 1, month=1)
+    return start, start.replace(month=start.month + 1)
+
+
+def get_partition_name(table: str, start: datetime) -> str:
+    return f"{table}_p{start:%Y%m%d}"
+
+
+def get_create_partition_statements(
+    table: str,
+    *,
+    interval: PartitionIntervalType,
+    now: datetime,
+    premake: int,
+) -> tuple[sql.Composed, ...]:
+    """获取创建当前分区及之后 premake 个分区的语句，可重复执行。"""
+    statements: list[sql.Composed] = []
+
+    start, end = get_partition_range(now, interval)
+    for _ in range(premake + 1):
+        statements.append(
+            sql.SQL(
+                "CREATE TABLE IF NOT EXISTS {} PARTITION OF {} "
+                "FOR VALUES FROM ({}) TO ({})"
+            ).format(
+                sql.Identifier(get_partition_name(table, start)),
+                sql.Identifier(table),
+                sql.Literal(start),
+                sql.Literal(end),
+            )
+        )
+        start, end = get_partition_range(end, interval)
+
+    return tuple(statements)
+
+
+def get_list_partitions_statement(table: str) -> sql.Composed:
+    return sql.SQL(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = quote_ident({})::regclass"
+    ).format(sql.Literal(table))
+
+
+def get_drop_partition_statements(
+    table: str,
+    partitions: list[str],
+    *,
+    interval: PartitionIntervalType,
+    now: datetime,
+    retention: timedelta,
+) -> tuple[sql.Composed, ...]:
+    """获取删除所有数据均早于保留期限的分区的语句。
+
+    仅处理名称符合 get_partition_name 格式的分区。
+    """
+    statements: list[sql.Composed] = []
+    prefix = f"{table}_p"
+
+    for name in partitions:
+        if not name.startswith(prefix):
+            continue
+
+        try:
+            start = datetime.strptime(name[len(prefix) :], r"%Y%m%d")
+        except ValueError:
+            continue
+
+        _, end = get_partition_range(start, interval)
+        if end <= now - retention:
+            statements.append(
+                sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(name))
+            )
+
+    return tuple(statements)
+
+
+def get_insert_statement(table: str, *, dedup_exceptions: bool = False) -> sql.Composed:
+    if dedup_exceptions:
+        return sql.SQL("INSERT INTO {} ({}) VALUES (%s, %s, %s, %s, %s, %s);").format(
+            sql.Identifier(table), _DEDUP_COLUMNS
+        )
+
+    return sql.SQL("INSERT INTO {} ({}) VALUES (%s, %s, %s, %s, %s);").format(
+        sql.Identifier(table), _COLUMNS
+    )
+
+
+def get_copy_statement(table: str, *, dedup_exceptions: bool = False) -> sql.Composed:
+    return sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table), _DEDUP_COLUMNS if dedup_exceptions else _COLUMNS
+    )
+
+
+def get_exception_upsert_statement(table: str) -> sql.Composed:
+    """获取写入异常堆栈的语句，已存在时累加出现次数，返回异常 ID。"""
+    return sql.SQL("""
+    INSERT INTO {} AS t (fingerprint, name, stack, occurrences, first_seen, last_seen)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (fingerprint) DO UPDATE SET
+        occurrences = t.occurrences + EXCLUDED.occurrences,
+        last_seen = GREATEST(t.last_seen, EXCLUDED.last_seen)
+    RETURNING id;
+    """).format(sql.Identifier(get_exceptions_table(table)))
+
+
+def get_query_statement(  # noqa: PLR0913
+    table: str,
+    *,
+    start: datetime | None,
+    end: datetime | None,
+    levels: tuple[LogLevelType, ...] | None,
+    extra: dict[str, ExtraType] | None,
+    after: tuple[datetime, int] | None,
+    descending: bool,
+    limit: int | None,
+    dedup_exceptions: bool,
+) -> tuple[sql.Composed, list]:
+    """获取查询日志的语句与参数。
+
+    结果按 (time, id) 排序，每行包含 time、id 与 JSON 格式的完整记录，
+    after 为上一页最后一条记录的 (time, id)，用于键集分页。
+    """
+    conditions: list[sql.Composable] = []
+    params: list = []
+
+    if start is not None:
+        conditions.append(sql.SQL("l.time >= %s"))
+        params.append(start)
+    if end is not None:
+        conditions.append(sql.SQL("l.time < %s"))
+        params.append(end)
+    if levels is not None:
+        conditions.append(sql.SQL("l.level = ANY(%s::enum_logs_level[])"))
+        params.append(list(levels))
+    if extra:
+        # 使用包含查询，以利用 extra 字段上的 GIN 索引
+        conditions.append(sql.SQL("l.extra @> %s"))
+        params.append(Jsonb(extra))
+    if after is not None:
+        conditions.append(
+            sql.SQL("(l.time, l.id) < (%s, %s)")
+            if descending
+            else sql.SQL("(l.time, l.id) > (%s, %s)")
+        )
+        params.extend(after)
+
+    if dedup_exceptions:
+        exception = sql.SQL(
+            "CASE WHEN l.exception_id IS NULL THEN NULL ELSE json_build_object("
+            "'name', e.name, 'desc', l.exception_desc, 'stack', e.stack) END"
+        )
+        source = sql.SQL("{} AS l LEFT JOIN {} AS e ON e.id = l.exception_id").format(
+            sql.Identifier(table), sql.Identifier(get_exceptions_table(table))
+        )
+    else:
+        exception = sql.SQL("l.exception")
+        source = sql.SQL("{} AS l").format(sql.Identifier(table))
+
+    statement = sql.SQL(
+        "SELECT l.time, l.id, json_build_object("
+        "'time', l.time, 'level', l.level, 'msg', l.msg, "
+        "'extra', l.extra, 'exception', {})::text FROM {}"
+    ).format(exception, source)
+
+    if conditions:
+        statement += sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions)
+
+    statement += (
+        sql.SQL(" ORDER BY l.time DESC, l.id DESC")
+        if descending
+        else sql.SQL(" ORDER BY l.time, l.id")
+    )
+
+    if limit is not None:
+        statement += sql.SQL(" LIMIT %s")
+        params.append(limit)
+
+    return statement, params
+
+
+def get_exception_fingerprint(exception: ExceptionField) -> str:
+    """根据异常类型与堆栈帧计算异常指纹。
+
+    异常描述通常包含变化的数据，不参与计算。
+    """
+    hasher = blake2b(exception.name.encode(), digest_size=16)
+    for frame in exception.stack or ():
+        hasher.update(
+            f"\n{frame.file_name}:{frame.line_number}:{frame.func_name}".encode()
+        )
+
+    return hasher.hexdigest()
+
+
+def group_exceptions(
+    records: list[Record],
+) -> tuple[list[str | None], list[tuple]]:
+    """按异常指纹对记录进行分组。
+
+    返回每条记录的异常指纹，以及每种异常的写入参数。
+    """
+    fingerprints: list[str | None] = []
+    params: dict[str, tuple] = {}
+
+    for record in records:
+        if not record.exception:
+            fingerprints.append(None)
+            continue
+
+        fingerprint = get_exception_fingerprint(record.exception)
+        fingerprints.append(fingerprint)
+
+        if fingerprint in params:
+            _, name, stack, occurrences, first_seen, last_seen = params[fingerprint]
+            params[fingerprint] = (
+                fingerprint,
+                name,
+                stack,
+                occurrences + 1,
+                min(first_seen, record.time),
+                max(last_seen, record.time),
+            )
+        else:
+            params[fingerprint] = (
+                fingerprint,
+                record.exception.name,
+                Jsonb(record.exception.stack) if record.exception.stack else None,
+                1,
+                record.time,
+                record.time,
+            )
+
+    return fingerprints, list(params.values())
+
+
+def record_to_row(record: Record) -> tuple:
+    return (
+        record.time,
+        record.level,
+        record.msg,
+        Jsonb(record.extra) if record.extra else None,
+        Jsonb(record.exception) if record.exception else None,
+    )
+
+
+def record_to_dedup_row(record: Record, exception_id: int | None) -> tuple:
+    return (
+        record.time,
+        record.level,
+        record.msg,
+        Jsonb(record.extra) if record.extra else None,
+        exception_id,
+        record.exception.desc if record.exception else None,
+    )
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import sys
+from atexit import register as atexit_register
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import TextIO
+
+from sshared.logging.config import LOG_LEVEL_CONFIG
+from sshared.logging.record import Record
+from sshared.logging.types import LogLevelType
+from sshared.terminal.color import Colors, fg_color
+
+
+class TerminalSink:
+    """日志终端输出。
+
+    输出目标为 TTY 时逐条写入并使用彩色输出；否则（如输出到管道）不使用颜色，
+    先写入内存缓冲区，超过 buffer_size 字符或每隔 flush_interval 秒统一写入一次。
+    """
+
+    def __init__(
+        self,
+        stream: TextIO | None = None,
+        /,
+        *,
+        color: bool | None = None,
+        buffered: bool | None = None,
+        buffer_size: int = 64 * 1024,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self._stream = stream if stream is not None else sys.stdout
+
+        is_tty = self._stream.isatty()
+        self._color = is_tty if color is None else color
+        self._buffered = not is_tty if buffered is None else buffered
+        self._buffer_size = buffer_size
+        self._flush_interval = flush_interval
+
+        # 预先渲染各等级的前缀，避免每条记录都进行格式化
+        self._level_prefixes: dict[LogLevelType, str] = {
+            level: self._colored(f"{level:<5}", config.color)
+            for level, config in LOG_LEVEL_CONFIG.items()
+        }
+        self._exception_prefix = self._colored("Exception", "RED")
+
+        # 同一秒内的记录复用时间戳字符串
+        # 以元组形式整体替换，避免多线程下秒数与字符串不一致
+        self._cached_timestamp: tuple[datetime | None, str] = (None, "")
+
+        self._lock = Lock()
+        self._pending: list[str] = []
+        self._pending_size = 0
+        self._flusher: Thread | None = None
+        self._flusher_stop = Event()
+
+        if self._buffered:
+            atexit_register(self.close)
+
+    def _colored(self, string: str, color: Colors) -> str:
+        return fg_color(string, color) if self._color else string
+
+    def _get_timestamp(self, time: datetime) -> str:
+        second = time.replace(microsecond=0)
+        cached_second, cached_string = self._cached_timestamp
+        if second == cached_second:
+            return cached_string
+
+        string = time.strftime(r"%y-%m-%d %H:%M:%S")
+        self._cached_timestamp = (second, string)
+        return string
+
+    def _render(self, record: Record) -> str:
+        main_string: list[str] = [
+            self._get_timestamp(record.time),
+            self._level_prefixes[record.level],
+            record.msg,
+        ]
+
+        if record.extra:
+            main_string.extend(f"{key}={value}" for key, value in record.extra.items())
+
+        if not record.exception:
+            return " ".join(main_string) + "\n"
+
+        exception_string: list[str] = [
+            self._exception_prefix,
+            f"{record.exception.name}({record.exception.desc})",
+        ]
+
+        if record.exception.stack:
+            for x in record.exception.stack:
+                exception_string.extend(
+                    [
+                        "\n    ",
+                        f"at {x.file_name}:{x.line_number} ->",
+                        f"{x.func_name} -> {x.line}",
+                    ]
+                )
+
+        return (
+            " ".join(main_string)
+            + "\n"
+            # 首行缩进
+            + "                  "
+            + " ".join(
+                # 对每一行进行缩进
+                x.replace("\n", "\n               ")
+                for x in exception_string
+            )
+            + "\n"
+        )
+
+    def _flush_pending(self) -> None:
+        """将缓冲区内容写入输出目标，调用方需持有锁。"""
+        if not self._pending:
+            return
+
+        self._stream.write("".join(self._pending))
+        self._stream.flush()
+        self._pending.clear()
+        self._pending_size = 0
+
+    def _run_flusher(self) -> None:
+        while not self._flusher_stop.wait(self._flush_interval):
+            self.flush()
+
+    def write(self, record: Record, /) -> None:
+        text = self._render(record)
+
+        with self._lock:
+            if not self._buffered:
+                self._stream.write(text)
+                self._stream.flush()
+                return
+
+            self._pending.append(text)
+            self._pending_size += len(text)
+            if self._pending_size >= self._buffer_size:
+                self._flush_pending()
+
+            # 首次写入时启动定时写入线程
+            if self._flusher is None:
+                self._flusher = Thread(
+                    target=self._run_flusher, name="sshared-log-flusher", daemon=True
+                )
+                self._flusher.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_pending()
+
+    def close(self) -> None:
+        """停止定时写入线程，并写入缓冲区中的剩余内容。"""
+        self._flusher_stop.set()
+        self.flush()
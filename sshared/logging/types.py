@@ -12,3 +12,7 @@ ExtraType = Union[
 
 
 LogLevelType = Literal["DEBUG", "INFO", "WARN", "ERROR", "FATAL"]
+
+OverflowPolicyType = Literal["DROP_OLDEST", "DROP_NEWEST", "BLOCK"]
+
+PartitionIntervalType = Literal["DAY", "WEEK", "MONTH"]
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import sys
+from atexit import register as atexit_register
+from atexit import unregister as atexit_unregister
+from threading import Thread
+from typing import Callable
+
+from sshared.logging.buffer import LogBuffer, LogBufferStats
+from sshared.logging.record import Record
+from sshared.logging.types import OverflowPolicyType
+from sshared.terminal.exception import pretty_exception
+
+
+def get_unavailable_delay(error: Exception, /) -> float | None:
+    """数据库暂时不可用（断路器断开或获取连接超时）时，返回重试前等待的秒数。
+
+    其它异常返回 None，对应的记录不再重试。
+    """
+    from sshared.postgres import CircuitOpenError, PoolTimeoutError
+
+    if isinstance(error, CircuitOpenError):
+        return error.retry_after
+    if isinstance(error, PoolTimeoutError):
+        return 0.0
+    return None
+
+
+class BatchWriter:
+    """在后台线程中批量写入日志记录。
+
+    记录先放入有界缓冲区，到达 batch_size 条，或等待超过 flush_interval 秒时，
+    调用 flush_func 进行一次批量写入。
+
+    指定 retry_delay 时，写入失败的异常经其判断为暂时不可用（返回等待秒数）后，
+    该批记录放回缓冲区，等待后重试，期间由缓冲区的 overflow_policy 决定丢弃哪些记录。
+    每次不可用只报告一次。缓冲区关闭后不再重试。
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        flush_func: Callable[[list[Record]], None],
+        /,
+        *,
+        batch_size: int,
+        flush_interval: float,
+        buffer_size: int,
+        overflow_policy: OverflowPolicyType,
+        block_timeout: float,
+        retry_delay: Callable[[Exception], float | None] | None = None,
+        name: str = "sshared-log-writer",
+    ) -> None:
+        self._flush_func = flush_func
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._retry_delay = retry_delay
+        # 是否已报告当前的不可用状态
+        self._unavailable = False
+
+        self._buffer = LogBuffer(
+            buffer_size, overflow_policy=overflow_policy, block_timeout=block_timeout
+        )
+        self._closed = False
+
+        self._thread = Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        # 进程退出时最多等待 5 秒，避免数据库不可用时无法退出
+        atexit_register(self.close, 5)
+
+    def _flush(self, batch: list[Record]) -> float | None:
+        """写入一批记录。
+
+        暂时不可用时将记录放回缓冲区，返回重试前等待的秒数，否则返回 None。
+        """
+        try:
+            self._flush_func(batch)
+        except Exception as e:
+            delay = self._retry_delay(e) if self._retry_delay is not None else None
+            if delay is not None and not self._buffer.closed:
+                self._buffer.requeue(batch)
+                if not self._unavailable:
+                    self._unavailable = True
+                    print(  # noqa: T201
+                        f"数据库不可用，日志暂存在缓冲区中等待重试\n{pretty_exception(e)}",
+                        file=sys.stderr,
+                    )
+                return delay
+
+            self._buffer.task_done(len(batch), failed=True)
+            # 写入失败时不能再通过日志记录器报告，否则可能陷入循环
+            # 已报告的不可用期间不再重复报告
+            if delay is None or not self._unavailable:
+                print(  # noqa: T201
+                    f"批量写入 {len(batch)} 条日志失败\n{pretty_exception(e)}",
+                    file=sys.stderr,
+                )
+        else:
+            self._buffer.task_done(len(batch))
+            self._unavailable = False
+
+        return None
+
+    def _run(self) -> None:
+        while True:
+            batch = self._buffer.get_batch(
+                self._batch_size, max_wait=self._flush_interval
+            )
+            # 缓冲区已关闭且所有记录均已写入
+            if batch is None:
+                return
+
+            delay = self._flush(batch)
+            if delay is not None:
+                # 缓冲区关闭时立即结束等待，写入剩余记录
+                self._buffer.wait_closed(max(delay, self._flush_interval))
+
+    def put(self, record: Record, /) -> bool:
+        """放入记录，返回记录是否被接收。
+
+        缓冲区已满时的行为由 overflow_policy 决定，不会无限期阻塞。
+        """
+        return self._buffer.put(record)
+
+    @property
+    def stats(self) -> LogBufferStats:
+        return self._buffer.stats
+
+    def close(self, timeout: float | None = None) -> None:
+        """写入所有剩余记录并停止后台线程。
+
+        重复调用时不作任何事。
+        """
+        if self._closed:
+            return
+
+        self._closed = True
+        atexit_unregister(self.close)
+        self._buffer.close()
+        self._thread.join(timeout)
@@ -1,5 +1,15 @@
+from .batch import execute_batch, execute_many
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
 from .json import enhance_json_process
 from .materialized_view import MaterializedView
-from .pool import Pool
-from .table import Table
+from .pool import Pool, PoolTimeoutError
+from .pool_group import PoolGroup
+from .pool_stats import HistogramSnapshot, PoolStats
+from .prepared import StatementRegistry
+from .query_cache import QueryCache
+from .refresh_manager import RefreshManager, RefreshStatus
+from .relation import Relation
+from .stream import astream_rows, stream_rows
+from .sync_pool import SyncPool
+from .table import Table, UpsertResult
 from .view import View
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from contextlib import AsyncExitStack
+from typing import TYPE_CHECKING, Any, Union
+
+from psycopg import AsyncConnection, AsyncCursor
+
+if TYPE_CHECKING:
+    from psycopg import sql
+    from psycopg.abc import Params
+    from typing_extensions import LiteralString, TypeAlias
+
+    QueryType: TypeAlias = Union[LiteralString, bytes, sql.SQL, sql.Composed]
+    StatementType: TypeAlias = Union[QueryType, tuple[QueryType, Union[Params, None]]]
+
+
+async def execute_batch(
+    conn: AsyncConnection,
+    statements: Sequence[StatementType],
+    /,
+    *,
+    transaction: bool = False,
+) -> list[list[tuple[Any, ...]]]:
+    """使用 Pipeline 模式执行多条语句，按顺序返回每条语句的结果行。
+
+    statements 中的每一项为语句，或 (语句, 参数) 元组。
+    所有语句在一次网络往返中发送，不返回结果的语句对应空列表。
+
+    transaction 为 True 时，所有语句在同一事务中执行，任一语句失败时全部回滚；
+    否则在自动提交模式下，失败语句之前的语句已生效，之后的语句不会执行。
+    """
+    cursors: list[AsyncCursor] = []
+
+    async with AsyncExitStack() as stack:
+        if transaction:
+            await stack.enter_async_context(conn.transaction())
+        await stack.enter_async_context(conn.pipeline())
+
+        for item in statements:
+            query, params = item if isinstance(item, tuple) else (item, None)
+            cursors.append(await conn.execute(query, params))
+
+    # 退出 Pipeline 后所有结果均已到达，获取结果不再产生网络往返
+    return [
+        await cursor.fetchall() if cursor.description is not None else []
+        for cursor in cursors
+    ]
+
+
+async def execute_many(
+    conn: AsyncConnection,
+    query: QueryType,
+    params_seq: Iterable[Params],
+    /,
+    *,
+    returning: bool = False,
+    transaction: bool = False,
+) -> list[tuple[Any, ...]]:
+    """使用同一语句执行多组参数，psycopg 会自动使用 Pipeline 模式批量发送。
+
+    returning 为 True 时，按参数顺序返回每组参数产生的结果行，否则返回空列表。
+    """
+    async with AsyncExitStack() as stack:
+        if transaction:
+            await stack.enter_async_context(conn.transaction())
+        cursor = await stack.enter_async_context(conn.cursor())
+
+        await cursor.executemany(query, params_seq, returning=returning)
+        if not returning:
+            return []
+
+        # 每组参数对应一个结果集
+        rows: list[tuple[Any, ...]] = []
+        while True:
+            rows.extend(await cursor.fetchall())
+            if not cursor.nextset():
+                return rows
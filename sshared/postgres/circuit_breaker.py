@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+from asyncio import sleep
+from collections.abc import Awaitable
+from random import random
+from threading import Lock
+from time import monotonic
+from time import sleep as sync_sleep
+from typing import Callable, Literal, TypeVar
+
+from psycopg import OperationalError
+
+CircuitStateType = Literal["CLOSED", "OPEN", "HALF_OPEN"]
+
+C = TypeVar("C")
+
+
+def get_backoff_delay(
+    attempt: int, /, *, base_delay: float = 0.05, max_delay: float = 5.0
+) -> float:
+    """获取第 attempt 次（从 0 开始）失败后的重试间隔。
+
+    间隔按指数增长，上限为 max_delay 秒，并加入随机抖动。
+    """
+    return random() * min(max_delay, base_delay * 2 ** min(attempt, 30))
+
+
+class CircuitOpenError(Exception):
+    """断路器断开时抛出，retry_after 为建议的重试间隔（秒）。"""
+
+    def __init__(self, message: str, /, *, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """数据库连接断路器。
+
+    连续 failure_threshold 次连接失败后断开，之后 reset_timeout 秒内的连接请求
+    直接抛出 CircuitOpenError，不再尝试连接。
+    超过 reset_timeout 秒后进入半开状态，仅允许一个探测连接，成功则恢复，
+    失败则重新断开。每次 before_attempt 之后，必须调用 record_success、
+    record_failure 或 abort_attempt 之一。
+
+    连接失败后的重试间隔按指数增长，上限为 max_delay 秒，并加入随机抖动，
+    避免数据库恢复时所有连接请求同时到达。默认参数下，断路器断开前的重试间隔
+    依次不超过 0.25、0.5、1、2 秒，即 base_delay * 2 ** (failure_threshold - 2)
+    恰好达到 max_delay。
+
+    可在多个线程中共享。
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout: float = 5.0,
+        base_delay: float = 0.25,
+        max_delay: float = 2.0,
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = Lock()
+
+    @property
+    def state(self) -> CircuitStateType:
+        if self._opened_at is None:
+            return "CLOSED"
+        if self._probing or monotonic() - self._opened_at >= self._reset_timeout:
+            return "HALF_OPEN"
+        return "OPEN"
+
+    def before_attempt(self) -> None:
+        """在尝试连接前调用，断路器断开时抛出 CircuitOpenError。"""
+        if self._opened_at is None:
+            return
+
+        with self._lock:
+            if self._opened_at is None:
+                return
+
+            remaining = self._reset_timeout - (monotonic() - self._opened_at)
+            if remaining > 0:
+                raise CircuitOpenError(
+                    f"数据库连接断路器已断开，{remaining:.2f}s 后重试",
+                    retry_after=remaining,
+                )
+            if self._probing:
+                raise CircuitOpenError(
+                    "数据库连接断路器半开，正在进行探测连接",
+                    # 探测连接很快会有结果，短暂等待后即可重试
+                    retry_after=self._base_delay,
+                )
+
+            self._probing = True
+
+    def abort_attempt(self) -> None:
+        """连接尝试被取消或因连接失败以外的原因中止时调用，不计为失败。
+
+        如果该尝试是半开状态下的探测连接，则允许下一次尝试重新探测。
+        """
+        if not self._probing:
+            return
+
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        if self._opened_at is None and not self._failures:
+            return
+
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self._failure_threshold:
+                self._opened_at = monotonic()
+                self._probing = False
+
+    def get_delay(self, attempt: int, /) -> float:
+        """获取第 attempt 次（从 0 开始）连接失败后的重试间隔。"""
+        return get_backoff_delay(
+            attempt, base_delay=self._base_delay, max_delay=self._max_delay
+        )
+
+
+def connect_with_retry(
+    connect: Callable[[], C], breaker: CircuitBreaker, /, *, wait: bool = False
+) -> C:
+    """调用 connect 创建连接。
+
+    连接失败时按断路器的策略退避重试，直到连接成功或断路器断开。
+    wait 为 True 时，断路器断开后等待其允许下一次尝试并继续重试，直到连接成功，
+    适用于启动时等待数据库就绪。
+    """
+    attempt = 0
+    while True:
+        try:
+            breaker.before_attempt()
+        except CircuitOpenError as e:
+            if not wait:
+                raise
+            sync_sleep(e.retry_after)
+            continue
+
+        try:
+            conn = connect()
+        except OperationalError:
+            breaker.record_failure()
+            # 断路器刚断开时不再等待，由下一次 before_attempt 处理
+            if breaker.state != "OPEN":
+                sync_sleep(breaker.get_delay(attempt))
+            attempt += 1
+        except BaseException:
+            # 连接被取消或遇到其它异常时，释放探测连接的权限
+            breaker.abort_attempt()
+            raise
+        else:
+            breaker.record_success()
+            return conn
+
+
+async def aconnect_with_retry(
+    connect: Callable[[], Awaitable[C]],
+    breaker: CircuitBreaker,
+    /,
+    *,
+    wait: bool = False,
+) -> C:
+    """connect_with_retry 的 asyncio 版本。"""
+    attempt = 0
+    while True:
+        try:
+            breaker.before_attempt()
+        except CircuitOpenError as e:
+            if not wait:
+                raise
+            await sleep(e.retry_after)
+            continue
+
+        try:
+            conn = await connect()
+        except OperationalError:
+            breaker.record_failure()
+            # 断路器刚断开时不再等待，由下一次 before_attempt 处理
+            if breaker.state != "OPEN":
+                await sleep(breaker.get_delay(attempt))
+            attempt += 1
+        except BaseException:
+            # 连接被取消或遇到其它异常时，释放探测连接的权限
+            breaker.abort_attempt()
+            raise
+        else:
+            breaker.record_success()
+            return conn
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from operator import attrgetter
+from typing import Any, Callable
+
+from msgspec import inspect
+
+# 未通过 Meta(extra={"pg_type": ...}) 指定时，按字段类型推断 PostgreSQL 类型
+_PG_TYPES: dict[type[inspect.Type], str] = {
+    inspect.BoolType: "boolean",
+    inspect.IntType: "bigint",
+    inspect.FloatType: "double precision",
+    inspect.StrType: "text",
+    inspect.BytesType: "bytea",
+    inspect.ByteArrayType: "bytea",
+    inspect.MemoryViewType: "bytea",
+    inspect.DateType: "date",
+    inspect.TimeDeltaType: "interval",
+    inspect.UUIDType: "uuid",
+    inspect.DecimalType: "numeric",
+    inspect.LiteralType: "text",
+    inspect.EnumType: "text",
+    inspect.ListType: "jsonb",
+    inspect.TupleType: "jsonb",
+    inspect.VarTupleType: "jsonb",
+    inspect.SetType: "jsonb",
+    inspect.FrozenSetType: "jsonb",
+    inspect.DictType: "jsonb",
+    inspect.StructType: "jsonb",
+    inspect.TypedDictType: "jsonb",
+    inspect.DataclassType: "jsonb",
+    inspect.NamedTupleType: "jsonb",
+}
+
+
+class Columns:
+    """由结构体字段推导的列信息。
+
+    overrides 为通过 Meta(extra={"pg_type": ...}) 指定的类型，未指定时为 None。
+    """
+
+    __slots__ = ("getter", "names", "overrides", "pg_types")
+
+    def __init__(
+        self,
+        names: tuple[str, ...],
+        pg_types: tuple[str, ...],
+        overrides: tuple[str | None, ...],
+    ) -> None:
+        self.names = names
+        self.pg_types = pg_types
+        self.overrides = overrides
+
+        # 获取一行中所有列的值，单列时同样返回元组
+        getter = attrgetter(*names)
+        self.getter: Callable[[Any], tuple[Any, ...]] = (
+            getter if len(names) > 1 else lambda x: (getter(x),)
+        )
+
+
+_CACHE: dict[type, Columns] = {}
+
+
+def _get_pg_type(field_type: inspect.Type, field_name: str) -> tuple[str, bool]:
+    """获取字段的 PostgreSQL 类型，以及该类型是否为显式指定。"""
+    extra: dict[str, Any] = {}
+
+    # 依次展开 Annotated 元数据与 Optional
+    while True:
+        if isinstance(field_type, inspect.Metadata):
+            extra = {**(field_type.extra or {}), **extra}
+            field_type = field_type.type
+        elif isinstance(field_type, inspect.UnionType):
+            types = [x for x in field_type.types if not isinstance(x, inspect.NoneType)]
+            if len(types) != 1:
+                break
+            field_type = types[0]
+        else:
+            break
+
+    if "pg_type" in extra:
+        return extra["pg_type"], True
+
+    if isinstance(field_type, inspect.DateTimeType):
+        return ("timestamptz" if field_type.tz else "timestamp"), False
+    if isinstance(field_type, inspect.TimeType):
+        return ("timetz" if field_type.tz else "time"), False
+
+    pg_type = _PG_TYPES.get(type(field_type))
+    if pg_type is None:
+        raise TypeError(
+            f"无法推断字段 {field_name} 的 PostgreSQL 类型，"
+            '请使用 Meta(extra={"pg_type": ...}) 指定'
+        )
+
+    return pg_type, False
+
+
+def get_columns(struct_type: type, /) -> Columns:
+    """获取结构体对应的列名与 PostgreSQL 类型，结果按类缓存。
+
+    列名为字段名（而非 rename 后的编码名），顺序与字段定义顺序相同。
+    """
+    columns = _CACHE.get(struct_type)
+    if columns is not None:
+        return columns
+
+    info = inspect.type_info(struct_type)
+    if not isinstance(info, inspect.StructType):
+        raise TypeError(f"{struct_type.__name__} 不是结构体类型")
+
+    pg_types = [_get_pg_type(x.type, x.name) for x in info.fields]
+    columns = Columns(
+        names=tuple(x.name for x in info.fields),
+        pg_types=tuple(x for x, _ in pg_types),
+        overrides=tuple(x if explicit else None for x, explicit in pg_types),
+    )
+    _CACHE[struct_type] = columns
+    return columns
@@ -3,36 +3,55 @@ from __future__ import annotations
 from time import sleep as sync_sleep
 from typing import TYPE_CHECKING
 
+from sshared.postgres.circuit_breaker import CircuitBreaker, connect_with_retry
+
 if TYPE_CHECKING:
     from psycopg import Connection
 
 
 class SyncConnectionManager:
-    def __init__(self, connection_string: str, /) -> None:
+    """同步连接管理器。
+
+    连接失败时按 circuit_breaker 的策略退避重试，断路器断开时，
+    get_conn 立即抛出 CircuitOpenError。get_conn 的 wait 为 True 时，
+    断路器断开后继续等待，直到连接成功，适用于启动时等待数据库就绪。
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        /,
+        *,
+        circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
         self._connection_string = connection_string
+        self._circuit_breaker = (
+            circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        )
         self._conn: Connection | None = None
         self._connecting = False
 
-    def _blocking_connect(self) -> None:
-        from psycopg import Connection, OperationalError
+    def _blocking_connect(self, *, wait: bool) -> None:
+        from psycopg import Connection
 
         self._connecting = True
 
-        while True:
-            try:
-                self._conn = Connection.connect(
-                    self._connection_string, autocommit=True
-                )
-                self._connecting = False
-            except OperationalError:
-                sync_sleep(0.1)
-            else:
-                return
-
-    def _blocking_waiting_for_conn(self) -> Connection:
+        try:
+            self._conn = connect_with_retry(
+                lambda: Connection.connect(self._connection_string, autocommit=True),
+                self._circuit_breaker,
+                wait=wait,
+            )
+        finally:
+            self._connecting = False
+
+    def _blocking_waiting_for_conn(self, *, wait: bool) -> Connection:
         while True:
             if self._conn:
                 return self._conn
+            # 连接失败（如断路器断开）时，重新走获取连接流程
+            if not self._connecting:
+                return self.get_conn(wait=wait)
 
             sync_sleep(0.03)
 
@@ -49,15 +68,15 @@ class SyncConnectionManager:
         else:
             return True
 
-    def get_conn(self) -> Connection:
+    def get_conn(self, *, wait: bool = False) -> Connection:
         # 尚未连接
         if not self._conn:
             # 如果正在尝试连接，阻塞等待
             if self._connecting:
-                return self._blocking_waiting_for_conn()
+                return self._blocking_waiting_for_conn(wait=wait)
 
             # 否则，尝试连接并返回
-            self._blocking_connect()
+            self._blocking_connect(wait=wait)
             return self._conn  # type: ignore
 
         # 已连接，检查状态
@@ -66,10 +85,12 @@ class SyncConnectionManager:
         if not ok:
             # 如果正在尝试连接，阻塞等待
             if self._connecting:
-                return self._blocking_waiting_for_conn()
+                return self._blocking_waiting_for_conn(wait=wait)
 
-            # 否则，尝试连接
-            self._blocking_connect()
+            # 否则，丢弃异常连接后尝试连接
+            self._conn.close()
+            self._conn = None
+            self._blocking_connect(wait=wait)
 
         # 状态正常，返回
-        return self._conn
+        return self._conn  # type: ignore
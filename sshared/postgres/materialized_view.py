@@ -1,7 +1,5 @@
-from sshared.strict_struct import StrictFrozenStruct
+from sshared.postgres.relation import Relation
 
 
-class MaterializedView(
-    StrictFrozenStruct, frozen=True, eq=False, forbid_unknown_fields=True
-):
-    pass
+class MaterializedView(Relation, frozen=True, eq=False, forbid_unknown_fields=True):
+    """物化视图结构体基类，子类通过 __table_name__ 指定物化视图名。"""
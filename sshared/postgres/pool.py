@@ -1,15 +1,85 @@
 from __future__ import annotations
 
-from asyncio import Queue, QueueEmpty, sleep
-from collections.abc import AsyncGenerator
+import sys
+from asyncio import (
+    CancelledError,
+    LifoQueue,
+    QueueEmpty,
+    Task,
+    gather,
+    get_running_loop,
+    sleep,
+    wait_for,
+)
+from asyncio import TimeoutError as AsyncTimeoutError
+from collections.abc import AsyncGenerator, Iterable, Sequence
 from contextlib import asynccontextmanager, suppress
-from random import random
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING, Any, Literal
 
 from psycopg import AsyncConnection, OperationalError
+from psycopg.pq import TransactionStatus
+
+from sshared.postgres.batch import execute_batch, execute_many
+from sshared.postgres.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    aconnect_with_retry,
+)
+from sshared.postgres.pool_stats import Histogram, PoolStats
+from sshared.postgres.prepared import StatementRegistry
+from sshared.terminal.exception import pretty_exception
+
+if TYPE_CHECKING:
+    from psycopg.abc import Params
+
+    from sshared.postgres.batch import QueryType, StatementType
+
+CheckModeType = Literal["ALWAYS", "IDLE", "NEVER"]
+
+# 等待连接期间，重新检查是否可以创建新连接的间隔
+_WAIT_RECHECK_INTERVAL = 0.1
+
+
+class PoolTimeoutError(TimeoutError):
+    pass
+
+
+class _PooledConn:
+    __slots__ = ("conn", "created_at", "last_used_at", "prepared_count")
+
+    def __init__(self, conn: AsyncConnection) -> None:
+        self.conn = conn
+        self.created_at = monotonic()
+        self.last_used_at = self.created_at
+        # 已在该连接上预编译的注册语句数量
+        self.prepared_count = 0
 
 
 class Pool:
-    def __init__(
+    """asyncio 连接池。
+
+    check_mode 控制取出连接时的检测策略：
+
+    - ALWAYS：每次取出连接时检测
+    - IDLE：仅检测空闲时间超过 idle_check_threshold 秒的连接
+    - NEVER：不检测，依赖查询失败时抛出的异常
+
+    无论何种策略，归还时已断开、已损坏或仍处于事务中的连接都会被丢弃。
+
+    调用 prepare 后，后台任务每隔 maintenance_interval 秒关闭空闲超过 max_idle 秒
+    的多余连接，回收存在时间超过 max_lifetime 秒的连接，并将连接数量补充到 min_size。
+
+    连接数量在创建连接前预留，任何时候都不会超过 max_size。
+
+    连接失败时按 circuit_breaker 的策略退避重试，断路器断开时，需要创建新连接的
+    获取请求立即抛出 CircuitOpenError。
+
+    通过 register_statement 注册的语句在新连接创建时预编译，
+    之后注册的语句在连接下次被取出时预编译。
+    """
+
+    def __init__(  # noqa: PLR0913
         self,
         connection_string: str,
         /,
@@ -17,33 +87,111 @@ class Pool:
         min_size: int,
         max_size: int,
         app_name: str | None = None,
+        check_mode: CheckModeType = "IDLE",
+        idle_check_threshold: float = 5.0,
+        max_idle: float | None = 600.0,
+        max_lifetime: float | None = 3600.0,
+        maintenance_interval: float = 30.0,
+        acquire_timeout: float | None = 30.0,
+        circuit_breaker: CircuitBreaker | None = None,
     ) -> None:
         self._connection_string = connection_string
         self._min_size = min_size
         self._max_size = max_size
         self._app_name = app_name
+        self._check_mode: CheckModeType = check_mode
+        self._idle_check_threshold = idle_check_threshold
+        self._max_idle = max_idle
+        self._max_lifetime = max_lifetime
+        self._maintenance_interval = maintenance_interval
+        self._acquire_timeout = acquire_timeout
+        self._circuit_breaker = (
+            circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        )
+
+        self._statements = StatementRegistry()
 
+        # 包含已创建和正在创建的连接
         self._total_conns_count: int = 0
-        self._avaliable_conns: Queue[AsyncConnection] = Queue()
+        self._waiting_count: int = 0
+        self._replenish_tasks: set[Task] = set()
 
-    async def _new_conn(self) -> AsyncConnection:
+        self._created_count = 0
+        self._closed_count = 0
+        self._check_failures_count = 0
+        self._acquire_timeouts_count = 0
+        self._acquire_wait = Histogram()
+        self._hold_time = Histogram()
+        # 后进先出，使空闲连接集中在队列底部，便于回收
+        self._avaliable_conns: LifoQueue[_PooledConn] = LifoQueue()
+        self._maintenance_task: Task | None = None
+
+    async def _new_conn(self, *, wait: bool = False) -> AsyncConnection:
         """创建新连接。
 
-        如果遇到异常，以随机间隔（最多不超过 0.25s）重试，直到连接成功。
+        如果遇到异常，以指数增长的随机间隔重试，直到连接成功或断路器断开。
+        wait 为 True 时，断路器断开后继续等待，直到连接成功。
         """
-        while True:
-            try:
-                conn = await AsyncConnection.connect(
-                    self._connection_string,
-                    autocommit=True,
-                    application_name=self._app_name,
-                    sslmode="disable",
-                )
-            except OperationalError:
-                await sleep(random() / 4)
+        return await aconnect_with_retry(
+            lambda: AsyncConnection.connect(
+                self._connection_string,
+                autocommit=True,
+                application_name=self._app_name,
+                sslmode="disable",
+            ),
+            self._circuit_breaker,
+            wait=wait,
+        )
+
+    async def _create_pooled_conn(self, *, wait: bool = False) -> _PooledConn:
+        """创建新连接，调用方需已预留连接数量。
+
+        创建被取消时，释放预留的连接数量。
+        """
+        try:
+            pooled = _PooledConn(await self._new_conn(wait=wait))
+        except BaseException:
+            self._total_conns_count -= 1
+            raise
+
+        try:
+            pooled.prepared_count = await self._statements.prepare(pooled.conn)
+        except BaseException:
+            await self._discard_conn(pooled.conn)
+            raise
+
+        self._created_count += 1
+        return pooled
+
+    async def _add_conns(self, count: int, *, wait: bool = False) -> None:
+        """并发创建 count 个连接并放入连接池，调用方需已预留连接数量。
+
+        部分连接创建失败时，仍将成功创建的连接放入连接池，之后抛出首个异常。
+        """
+        error: BaseException | None = None
+        for result in await gather(
+            *(self._create_pooled_conn(wait=wait) for _ in range(count)),
+            return_exceptions=True,
+        ):
+            if isinstance(result, BaseException):
+                error = error or result
             else:
-                self._total_conns_count += 1
-                return conn
+                self._avaliable_conns.put_nowait(result)
+
+        if error is not None:
+            raise error
+
+    async def _replenish(self) -> None:
+        """在后台补充一个连接，调用方需已预留连接数量。"""
+        try:
+            await self._add_conns(1)
+        except CircuitOpenError:
+            # 断路器断开时，等待中的调用方将在超时后收到异常
+            pass
+        except Exception as e:
+            print(  # noqa: T201
+                f"连接池补充连接失败\n{pretty_exception(e)}", file=sys.stderr
+            )
 
     async def close_conn(self, conn: AsyncConnection) -> None:
         """关闭连接。
@@ -57,6 +205,7 @@ class Pool:
         with suppress(OperationalError):
             await conn.close()
         self._total_conns_count -= 1
+        self._closed_count += 1
 
     async def _check_conn(self, conn: AsyncConnection) -> bool:
         """检测连接是否正常。"""
@@ -67,56 +216,325 @@ class Pool:
         else:
             return True
 
-    async def _block_get_conn_from_pool(self) -> AsyncConnection:
+    def _need_check(self, pooled: _PooledConn) -> bool:
+        if self._check_mode == "ALWAYS":
+            return True
+        if self._check_mode == "NEVER":
+            return False
+
+        return monotonic() - pooled.last_used_at > self._idle_check_threshold
+
+    def _is_expired(self, pooled: _PooledConn, now: float) -> bool:
+        return (
+            self._max_lifetime is not None
+            and now - pooled.created_at > self._max_lifetime
+        )
+
+    def _is_reusable(self, pooled: _PooledConn) -> bool:
+        """不发送请求，根据连接的本地状态判断是否可以归还到连接池中。"""
+        conn = pooled.conn
+        return (
+            not conn.closed
+            and not conn.broken
+            and conn.info.transaction_status == TransactionStatus.IDLE
+            and not self._is_expired(pooled, monotonic())
+        )
+
+    async def _discard_conn(self, conn: AsyncConnection) -> None:
+        """关闭连接，并将其移出连接池。
+
+        如果有调用方正在等待连接，在后台创建新连接补充。
+        """
+        self._total_conns_count -= 1
+        if self._waiting_count > 0 and self._total_conns_count < self._max_size:
+            self._total_conns_count += 1
+            task = get_running_loop().create_task(self._replenish())
+            self._replenish_tasks.add(task)
+            task.add_done_callback(self._replenish_tasks.discard)
+
+        self._closed_count += 1
+        with suppress(OperationalError):
+            await conn.close()
+
+    async def _block_get_conn_from_pool(self) -> _PooledConn | None:
         """从连接池中获取连接。
 
         如果没有可用的连接，阻塞等待。
+        等待期间连接数量低于上限（如连接被丢弃或创建失败）时返回 None，
+        由调用方重新尝试创建连接。
         """
-        return await self._avaliable_conns.get()
+        self._waiting_count += 1
+        try:
+            while True:
+                with suppress(AsyncTimeoutError):
+                    return await wait_for(
+                        self._avaliable_conns.get(), _WAIT_RECHECK_INTERVAL
+                    )
+
+                if self._total_conns_count < self._max_size:
+                    return None
+        finally:
+            self._waiting_count -= 1
+
+    def _get_conn_nowait(self) -> _PooledConn | None:
+        """不等待地获取无需检查的可用连接，没有时返回 None。"""
+        if self._avaliable_conns.empty():
+            return None
+
+        pooled = self._avaliable_conns.get_nowait()
+        if self._need_check(pooled):
+            self._avaliable_conns.put_nowait(pooled)
+            return None
+
+        return pooled
+
+    async def _acquire(self) -> _PooledConn:
+        while True:
+            try:
+                # 先尝试直接从连接池中获取连接
+                pooled = self._avaliable_conns.get_nowait()
+            except QueueEmpty:
+                # 连接池中没有可用的连接
+                # 如果连接数量未达到上限，预留数量后创建新连接，新连接无需检查
+                if self._total_conns_count < self._max_size:
+                    self._total_conns_count += 1
+                    return await self._create_pooled_conn()
+                # 如果连接数量达到上限，阻塞并等待有连接可用
+                pooled = await self._block_get_conn_from_pool()
+                if pooled is None:
+                    continue
+
+            # 检查连接是否正常，如果正常则将连接交给调用方
+            try:
+                if not self._need_check(pooled) or await self._check_conn(pooled.conn):
+                    return pooled
+            except BaseException:
+                # 检查被取消时，将连接放回连接池
+                self._avaliable_conns.put_nowait(pooled)
+                raise
+
+            # 如果连接不正常，该连接将不会被归还到可用连接池中
+            # 关闭连接并减少总连接数量，之后继续循环执行获取连接逻辑
+            self._check_failures_count += 1
+            await self._discard_conn(pooled.conn)
+
+    async def _maintain(self) -> None:
+        """回收空闲或过期的连接，并将连接数量补充到 min_size。"""
+        now = monotonic()
+        kept: list[_PooledConn] = []
+        expired: list[_PooledConn] = []
+
+        while not self._avaliable_conns.empty():
+            pooled = self._avaliable_conns.get_nowait()
+            if self._is_expired(pooled, now) or (
+                self._max_idle is not None
+                and now - pooled.last_used_at > self._max_idle
+                and self._total_conns_count - len(expired) > self._min_size
+            ):
+                expired.append(pooled)
+            else:
+                kept.append(pooled)
+
+        # 按原顺序放回，保持最近使用的连接位于队列顶部
+        for pooled in reversed(kept):
+            self._avaliable_conns.put_nowait(pooled)
+
+        for pooled in expired:
+            await self._discard_conn(pooled.conn)
+
+        if self._total_conns_count < self._min_size:
+            count = self._min_size - self._total_conns_count
+            self._total_conns_count += count
+            await self._add_conns(count)
+
+    async def _run_maintenance(self) -> None:
+        while True:
+            await sleep(self._maintenance_interval)
+            try:
+                await self._maintain()
+            except CircuitOpenError:
+                # 断路器断开时跳过补充连接，等待下次维护
+                pass
+            except Exception as e:
+                # 维护失败时继续运行，避免空闲回收与补充连接就此停止
+                print(  # noqa: T201
+                    f"连接池维护失败\n{pretty_exception(e)}", file=sys.stderr
+                )
 
     async def prepare(self) -> None:
-        """创建新连接，直到连接池至少有 min_size 个连接。"""
-        while self._avaliable_conns.qsize() < self._min_size:
-            self._avaliable_conns.put_nowait(await self._new_conn())
+        """并发创建新连接，直到连接池至少有 min_size 个连接，并启动后台维护任务。
+
+        数据库不可用时，不因断路器断开而失败，而是等待直到连接成功，
+        使应用可以先于数据库启动。
+        """
+        if self._total_conns_count < self._min_size:
+            count = self._min_size - self._total_conns_count
+            self._total_conns_count += count
+            await self._add_conns(count, wait=True)
+
+        if self._maintenance_task is None:
+            self._maintenance_task = get_running_loop().create_task(
+                self._run_maintenance()
+            )
 
     async def close(self) -> None:
         """关闭连接池中的所有连接。
 
         调用此方法后，该连接池不应再被使用。
         """
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            with suppress(CancelledError):
+                await self._maintenance_task
+            self._maintenance_task = None
+
+        for task in tuple(self._replenish_tasks):
+            task.cancel()
+            with suppress(CancelledError):
+                await task
+
         while not self._avaliable_conns.empty():
-            conn = self._avaliable_conns.get_nowait()
-            await self.close_conn(conn)
+            pooled = self._avaliable_conns.get_nowait()
+            await self.close_conn(pooled.conn)
 
     @asynccontextmanager
-    async def get_conn(self) -> AsyncGenerator[AsyncConnection]:
+    async def get_conn(
+        self, *, timeout: float | None = None
+    ) -> AsyncGenerator[AsyncConnection]:
         """获取连接。
 
         如果没有可用的连接，该函数将阻塞，直到有连接可用。
+        超过 timeout 秒（未指定时使用 acquire_timeout）仍未获取到连接时，
+        抛出 PoolTimeoutError。
         """
-        while True:
+        if timeout is None:
+            timeout = self._acquire_timeout
+
+        start = perf_counter()
+        # 有可直接使用的连接时，不创建超时等待任务
+        pooled = self._get_conn_nowait()
+        if pooled is None:
             try:
-                # 先尝试直接从连接池中获取连接
-                conn = self._avaliable_conns.get_nowait()
-            except QueueEmpty:
-                # 连接池中没有可用的连接
-                # 如果连接数量未达到上限，创建新连接
-                if self._total_conns_count < self._max_size:
-                    conn = await self._new_conn()
-                # 如果连接数量达到上限，阻塞并等待有连接可用
-                else:
-                    conn = await self._block_get_conn_from_pool()
+                pooled = await wait_for(self._acquire(), timeout)
+            except AsyncTimeoutError:
+                self._acquire_timeouts_count += 1
+                raise PoolTimeoutError(
+                    f"获取连接超时（{timeout}s），"
+                    f"当前连接数量：{self._total_conns_count}"
+                ) from None
 
-            # 检查连接是否正常，如果正常则跳出循环，将连接交给调用方
-            if await self._check_conn(conn):
-                break
+        acquired_at = perf_counter()
+        self._acquire_wait.observe(acquired_at - start)
 
-            # 如果连接不正常，该连接将不会被归还到可用连接池中
-            # 此时减少总连接数量，之后继续循环执行获取连接逻辑
-            self._total_conns_count -= 1
+        # 连接创建后注册了新语句
+        if pooled.prepared_count < len(self._statements):
+            try:
+                pooled.prepared_count = await self._statements.prepare(
+                    pooled.conn, start=pooled.prepared_count
+                )
+            except BaseException:
+                # 部分语句可能已预编译，连接状态与 prepared_count 不一致，直接丢弃
+                await self._discard_conn(pooled.conn)
+                raise
 
         try:
-            yield conn
+            yield pooled.conn
         finally:
-            # 将连接归还到可用连接池中
-            self._avaliable_conns.put_nowait(conn)
+            self._hold_time.observe(perf_counter() - acquired_at)
+            # 将连接归还到可用连接池中，状态异常的连接直接丢弃
+            if self._is_reusable(pooled):
+                pooled.last_used_at = monotonic()
+                self._avaliable_conns.put_nowait(pooled)
+            else:
+                await self._discard_conn(pooled.conn)
+
+    @property
+    def statements(self) -> StatementRegistry:
+        """预编译语句注册表，可用于在 get_conn 获取的连接上执行预编译语句。"""
+        return self._statements
+
+    async def register_statement(
+        self,
+        name: str,
+        query: QueryType,
+        /,
+        *,
+        param_types: Sequence[str] | None = None,
+    ) -> None:
+        """注册预编译语句，参见 StatementRegistry。
+
+        注册前在一个连接上试预编译，失败时抛出异常且不注册，
+        避免无法预编译的语句导致之后取出的每个连接都失败。
+        建议在 prepare 之前调用，使其余连接在创建时即完成预编译。
+        """
+        async with self.get_conn() as conn:
+            await self._statements.validate(conn, name, query, param_types=param_types)
+
+        self._statements.register(name, query, param_types=param_types)
+
+    async def execute_prepared(
+        self, name: str, params: Sequence[Any] | None = None, /
+    ) -> list[tuple[Any, ...]]:
+        """获取连接并执行预编译语句，返回结果行，不返回结果的语句返回空列表。"""
+        async with self.get_conn() as conn:
+            cursor = await self._statements.execute(conn, name, params)
+            return await cursor.fetchall() if cursor.description is not None else []
+
+    async def execute_batch(
+        self,
+        statements: Sequence[StatementType],
+        /,
+        *,
+        transaction: bool = False,
+    ) -> list[list[tuple[Any, ...]]]:
+        """获取连接并使用 Pipeline 模式执行多条语句，参见 batch.execute_batch。"""
+        async with self.get_conn() as conn:
+            return await execute_batch(conn, statements, transaction=transaction)
+
+    async def execute_many(
+        self,
+        query: QueryType,
+        params_seq: Iterable[Params],
+        /,
+        *,
+        returning: bool = False,
+        transaction: bool = False,
+    ) -> list[tuple[Any, ...]]:
+        """获取连接并使用同一语句执行多组参数，参见 batch.execute_many。"""
+        async with self.get_conn() as conn:
+            return await execute_many(
+                conn,
+                query,
+                params_seq,
+                returning=returning,
+                transaction=transaction,
+            )
+
+    @property
+    def load(self) -> float:
+        """使用中与等待中的连接数量占 max_size 的比例，可能大于 1。"""
+        in_use = self._total_conns_count - self._avaliable_conns.qsize()
+        return (in_use + self._waiting_count) / self._max_size
+
+    @property
+    def healthy(self) -> bool:
+        """断路器是否未处于断开状态。"""
+        return self._circuit_breaker.state != "OPEN"
+
+    @property
+    def stats(self) -> PoolStats:
+        """连接池状态与累计指标的快照。"""
+        idle = self._avaliable_conns.qsize()
+        return PoolStats(
+            total=self._total_conns_count,
+            idle=idle,
+            in_use=self._total_conns_count - idle,
+            waiting=self._waiting_count,
+            max_size=self._max_size,
+            created=self._created_count,
+            closed=self._closed_count,
+            check_failures=self._check_failures_count,
+            acquire_timeouts=self._acquire_timeouts_count,
+            acquire_wait=self._acquire_wait.snapshot(),
+            hold_time=self._hold_time.snapshot(),
+        )
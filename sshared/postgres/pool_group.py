@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator, Sequence
+from contextlib import AsyncExitStack, asynccontextmanager
+from contextvars import ContextVar
+from time import monotonic
+
+from psycopg import AsyncConnection, OperationalError
+
+from sshared.postgres.circuit_breaker import CircuitOpenError
+from sshared.postgres.pool import Pool, PoolTimeoutError
+
+
+class PoolGroup:
+    """主从连接池组。
+
+    写操作使用主库，读操作使用负载最低的从库，没有可用从库时使用主库。
+    断路器断开或获取连接失败的从库在 unhealthy_cooldown 秒内不会被选择。
+
+    read_your_writes 为 True 时，同一上下文（asyncio 任务）中通过主库写入后，
+    之后的读操作也使用主库，避免读取到尚未同步到从库的数据。
+    """
+
+    def __init__(
+        self,
+        primary: Pool,
+        replicas: Sequence[Pool] = (),
+        /,
+        *,
+        read_your_writes: bool = True,
+        unhealthy_cooldown: float = 5.0,
+    ) -> None:
+        self._primary = primary
+        self._replicas = tuple(replicas)
+        self._read_your_writes = read_your_writes
+        self._unhealthy_cooldown = unhealthy_cooldown
+
+        # 从库不可用的截止时间
+        self._unhealthy_until: dict[Pool, float] = {}
+        # 当前上下文（如一次请求）是否已通过该连接池组的主库写入
+        self._wrote_to_primary: ContextVar[bool] = ContextVar(
+            f"sshared_pool_group_wrote_to_primary_{id(self)}", default=False
+        )
+
+    @property
+    def primary(self) -> Pool:
+        return self._primary
+
+    @property
+    def replicas(self) -> tuple[Pool, ...]:
+        return self._replicas
+
+    async def prepare(self) -> None:
+        for pool in (self._primary, *self._replicas):
+            await pool.prepare()
+
+    async def close(self) -> None:
+        for pool in (self._primary, *self._replicas):
+            await pool.close()
+
+    def _get_read_candidates(self) -> list[Pool]:
+        """获取可用于读操作的从库，按负载升序排列。"""
+        now = monotonic()
+        candidates = [
+            x
+            for x in self._replicas
+            if x.healthy and self._unhealthy_until.get(x, 0) <= now
+        ]
+        candidates.sort(key=lambda x: x.load)
+        return candidates
+
+    @asynccontextmanager
+    async def get_write_conn(
+        self, *, timeout: float | None = None
+    ) -> AsyncGenerator[AsyncConnection]:
+        """获取主库连接。"""
+        async with self._primary.get_conn(timeout=timeout) as conn:
+            # 获取连接成功后才标记，获取失败时不影响之后的读操作
+            if self._read_your_writes:
+                self._wrote_to_primary.set(True)
+
+            yield conn
+
+    @asynccontextmanager
+    async def get_read_conn(
+        self, *, timeout: float | None = None
+    ) -> AsyncGenerator[AsyncConnection]:
+        """获取用于读操作的连接。
+
+        从库获取连接失败时，尝试下一个从库，最后使用主库。
+        """
+        async with AsyncExitStack() as stack:
+            conn: AsyncConnection | None = None
+
+            if not (self._read_your_writes and self._wrote_to_primary.get()):
+                for pool in self._get_read_candidates():
+                    try:
+                        conn = await stack.enter_async_context(
+                            pool.get_conn(timeout=timeout)
+                        )
+                    except (CircuitOpenError, PoolTimeoutError, OperationalError):
+                        self._unhealthy_until[pool] = (
+                            monotonic() + self._unhealthy_cooldown
+                        )
+                    else:
+                        break
+
+            if conn is None:
+                conn = await stack.enter_async_context(
+                    self._primary.get_conn(timeout=timeout)
+                )
+
+            yield conn
+
+    def reset_read_your_writes(self) -> None:
+        """清除当前上下文的写入标记，之后的读操作重新使用从库。"""
+        self._wrote_to_primary.set(False)
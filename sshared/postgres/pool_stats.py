@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+
+from sshared.strict_struct import NonNegativeFloat, NonNegativeInt, StrictFrozenStruct
+
+# 单位为秒，覆盖从本地连接池命中到长时间阻塞的范围
+DEFAULT_BOUNDS: tuple[float, ...] = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class HistogramSnapshot(StrictFrozenStruct, frozen=True, eq=False, gc=False):
+    # 各桶的上界（包含），最后一个桶没有上界
+    bounds: tuple[NonNegativeFloat, ...]
+    # 各桶的观测数量，比 bounds 多一个元素
+    counts: tuple[NonNegativeInt, ...]
+    count: NonNegativeInt
+    sum: NonNegativeFloat
+
+    def quantile(self, q: float, /) -> float | None:
+        """估算分位数，返回所在桶的上界。
+
+        没有观测值时返回 None，落在最后一个桶时返回 inf。
+        """
+        if not self.count:
+            return None
+
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+
+        return float("inf")
+
+
+class Histogram:
+    """固定分桶的直方图，记录一次观测值的开销为一次二分查找。"""
+
+    __slots__ = ("_bounds", "_count", "_counts", "_sum")
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BOUNDS, /) -> None:
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+
+    def observe(self, value: float, /) -> None:
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self._count += 1
+        self._sum += value
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            bounds=self._bounds,
+            counts=tuple(self._counts),
+            count=self._count,
+            sum=self._sum,
+        )
+
+
+class PoolStats(StrictFrozenStruct, frozen=True, eq=False, gc=False):
+    # 包含正在创建的连接
+    total: NonNegativeInt
+    idle: NonNegativeInt
+    in_use: NonNegativeInt
+    waiting: NonNegativeInt
+    max_size: NonNegativeInt
+
+    created: NonNegativeInt
+    closed: NonNegativeInt
+    check_failures: NonNegativeInt
+    acquire_timeouts: NonNegativeInt
+
+    # 获取连接的等待时间与连接的占用时间，单位为秒
+    acquire_wait: HistogramSnapshot
+    hold_time: HistogramSnapshot
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+from psycopg import AsyncConnection, AsyncCursor, sql
+
+if TYPE_CHECKING:
+    from sshared.postgres.batch import QueryType
+
+_PLACEHOLDER_PATTERN = re.compile(r"%(%|[sbt]|\()")
+
+
+def to_numbered_placeholders(query: str, /) -> str:
+    """将 psycopg 风格的 %s 占位符转换为 PostgreSQL 的 $1、$2 形式。
+
+    不支持 %(name)s 形式的命名占位符。
+    """
+    count = 0
+
+    def replace(match: re.Match[str]) -> str:
+        nonlocal count
+
+        placeholder = match.group(1)
+        if placeholder == "%":
+            return "%"
+        if placeholder == "(":
+            raise ValueError("预编译语句不支持命名占位符")
+
+        count += 1
+        return f"${count}"
+
+    return _PLACEHOLDER_PATTERN.sub(replace, query)
+
+
+class _Statement:
+    __slots__ = ("name", "param_types", "prepare_statement", "query")
+
+    def __init__(
+        self, name: str, query: QueryType, param_types: tuple[str, ...] | None
+    ) -> None:
+        self.name = name
+        self.query = query
+        self.param_types = param_types
+        # 首次预编译时生成
+        self.prepare_statement: bytes | None = None
+
+
+class StatementRegistry:
+    """预编译语句注册表。
+
+    注册的语句在每个连接上通过 PREPARE 预编译，之后通过名称使用 EXECUTE 执行，
+    省去每次执行时的解析与计划开销。注册表只能追加，语句名称不能重复。
+
+    param_types 用于指定服务端无法推断的参数类型，如 ("int", "text")。
+    """
+
+    def __init__(self) -> None:
+        self._statements: dict[str, _Statement] = {}
+        self._order: list[_Statement] = []
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._statements
+
+    def _new_statement(
+        self, name: str, query: QueryType, param_types: Sequence[str] | None
+    ) -> _Statement:
+        if name in self._statements:
+            raise ValueError(f"预编译语句 {name} 已注册")
+
+        return _Statement(
+            name, query, tuple(param_types) if param_types is not None else None
+        )
+
+    def register(
+        self,
+        name: str,
+        query: QueryType,
+        /,
+        *,
+        param_types: Sequence[str] | None = None,
+    ) -> None:
+        statement = self._new_statement(name, query, param_types)
+        self._statements[name] = statement
+        self._order.append(statement)
+
+    async def validate(
+        self,
+        conn: AsyncConnection,
+        name: str,
+        query: QueryType,
+        /,
+        *,
+        param_types: Sequence[str] | None = None,
+    ) -> None:
+        """在连接上试预编译语句后立即释放，不注册。
+
+        语句无法预编译时抛出异常，可在注册前调用，
+        避免注册后每个连接预编译时都失败。
+        """
+        statement = self._new_statement(name, query, param_types)
+        await conn.execute(self._get_prepare_statement(statement, conn))
+        await conn.execute(sql.SQL("DEALLOCATE {}").format(sql.Identifier(name)))
+
+    def _get_prepare_statement(
+        self, statement: _Statement, conn: AsyncConnection
+    ) -> bytes:
+        if statement.prepare_statement is None:
+            query = statement.query
+            if isinstance(query, sql.Composable):
+                query = query.as_string(conn)
+            elif isinstance(query, bytes):
+                query = query.decode()
+
+            header = f"PREPARE {sql.Identifier(statement.name).as_string(conn)}"
+            if statement.param_types is not None:
+                header += f"({', '.join(statement.param_types)})"
+
+            statement.prepare_statement = (
+                f"{header} AS {to_numbered_placeholders(query)}".encode()
+            )
+
+        return statement.prepare_statement
+
+    async def prepare(self, conn: AsyncConnection, /, *, start: int = 0) -> int:
+        """在连接上预编译第 start 个之后注册的语句，返回已预编译的语句数量。
+
+        所有语句在一次网络往返中发送。
+        """
+        statements = self._order[start:]
+        if not statements:
+            return start
+
+        async with conn.pipeline():
+            for statement in statements:
+                await conn.execute(self._get_prepare_statement(statement, conn))
+
+        return start + len(statements)
+
+    def get_execute_statement(
+        self, name: str, params: Sequence[Any] | None = None, /
+    ) -> sql.Composed:
+        """获取执行预编译语句的语句，参数以字面量形式内联。"""
+        if name not in self._statements:
+            raise KeyError(f"预编译语句 {name} 未注册")
+
+        statement = sql.SQL("EXECUTE {}").format(sql.Identifier(name))
+        if params:
+            statement += sql.SQL("({})").format(
+                sql.SQL(", ").join(sql.Literal(x) for x in params)
+            )
+
+        return statement
+
+    async def execute(
+        self,
+        conn: AsyncConnection,
+        name: str,
+        params: Sequence[Any] | None = None,
+        /,
+    ) -> AsyncCursor:
+        """在已预编译该语句的连接上执行预编译语句。"""
+        return await conn.execute(self.get_execute_statement(name, params))
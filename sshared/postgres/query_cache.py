@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import sys
+from asyncio import CancelledError, Future, Task, get_running_loop, shield, sleep
+from collections import OrderedDict
+from collections.abc import Awaitable, Sequence
+from contextlib import suppress
+from time import monotonic
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from msgspec import msgpack
+from psycopg import AsyncConnection, Error, sql
+
+from sshared.postgres.circuit_breaker import get_backoff_delay
+from sshared.terminal.exception import pretty_exception
+
+if TYPE_CHECKING:
+    from psycopg.abc import Params
+
+    from sshared.postgres.batch import QueryType
+    from sshared.postgres.pool import Pool
+    from sshared.postgres.relation import Relation
+
+T = TypeVar("T", bound="Relation")
+
+_KeyType = tuple[type, str, bytes]
+
+
+class _Entry:
+    __slots__ = ("channels", "expires_at", "items")
+
+    def __init__(
+        self, items: list[Any], expires_at: float, channels: frozenset[str]
+    ) -> None:
+        self.items = items
+        self.expires_at = expires_at
+        self.channels = channels
+
+
+def _get_key(
+    relation_type: type, query: QueryType | None, params: Params | None
+) -> _KeyType:
+    if query is None:
+        text = ""
+    elif isinstance(query, sql.Composable):
+        text = query.as_string(None)
+    elif isinstance(query, bytes):
+        text = query.decode()
+    else:
+        text = query
+
+    # 参数可能包含列表等不可哈希的值，编码后作为键
+    return relation_type, text, msgpack.encode(params)
+
+
+class QueryCache:
+    """查询结果缓存，以结构体类型、查询语句与参数作为键。
+
+    缓存最多保存 max_size 条结果，超出时淘汰最久未使用的结果，
+    结果在 ttl 秒后过期。同一查询的并发未命中只会执行一次查询。
+
+    指定 listen_conninfo 时，使用独立连接监听 channels 中的频道，
+    收到通知后清除关联该频道的缓存。监听连接断开期间可能遗漏通知，
+    因此断开与重新监听时会清除全部缓存。
+    """
+
+    def __init__(
+        self,
+        pool: Pool,
+        /,
+        *,
+        max_size: int = 1024,
+        ttl: float = 60.0,
+        listen_conninfo: str | None = None,
+        channels: Sequence[str] = (),
+    ) -> None:
+        self._pool = pool
+        self._max_size = max_size
+        self._ttl = ttl
+        self._listen_conninfo = listen_conninfo
+        self._channels = frozenset(channels)
+
+        self._entries: OrderedDict[_KeyType, _Entry] = OrderedDict()
+        self._loading: dict[_KeyType, Future[list[Any]]] = {}
+        # 每次清除缓存时递增，清除前开始的查询结果不会写入缓存
+        self._generation = 0
+        # 各频道收到通知时递增，仅影响关联该频道的查询
+        self._channel_generations: dict[str, int] = {}
+        self._listen_task: Task | None = None
+
+        self._hits_count = 0
+        self._misses_count = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hits_count(self) -> int:
+        return self._hits_count
+
+    @property
+    def misses_count(self) -> int:
+        return self._misses_count
+
+    def _get(self, key: _KeyType) -> list[Any] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.expires_at <= monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return entry.items
+
+    def _put(self, key: _KeyType, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def _get_generations(self, channels: frozenset[str]) -> tuple[int, ...]:
+        return (
+            self._generation,
+            *(self._channel_generations.get(x, 0) for x in channels),
+        )
+
+    async def _load(
+        self,
+        key: _KeyType,
+        loader: Awaitable[list[T]],
+        expires_in: float,
+        channels: frozenset[str],
+    ) -> list[T]:
+        generations = self._get_generations(channels)
+        try:
+            items = await loader
+        finally:
+            del self._loading[key]
+
+        if generations == self._get_generations(channels):
+            self._put(key, _Entry(items, monotonic() + expires_in, channels))
+
+        return items
+
+    async def fetch(
+        self,
+        relation_type: type[T],
+        query: QueryType | None = None,
+        params: Params | None = None,
+        /,
+        *,
+        ttl: float | None = None,
+        channels: Sequence[str] = (),
+    ) -> list[T]:
+        """读取缓存的查询结果，未命中时查询并缓存。
+
+        ttl 未指定时使用缓存的默认值。
+        channels 为与该查询关联的频道，收到其中任一频道的通知时清除该结果。
+        返回的列表为副本，可以修改。
+        """
+        unknown_channels = set(channels) - self._channels
+        if unknown_channels:
+            raise ValueError(f"未监听的频道：{', '.join(sorted(unknown_channels))}")
+
+        key = _get_key(relation_type, query, params)
+
+        items = self._get(key)
+        if items is not None:
+            self._hits_count += 1
+            return list(items)
+
+        self._misses_count += 1
+
+        loading = self._loading.get(key)
+        if loading is None:
+
+            async def load() -> list[T]:
+                async with self._pool.get_conn() as conn:
+                    return await relation_type.fetch(conn, query, params)
+
+            loading = get_running_loop().create_task(
+                self._load(
+                    key,
+                    load(),
+                    ttl if ttl is not None else self._ttl,
+                    frozenset(channels),
+                )
+            )
+            self._loading[key] = loading
+
+        # 某个等待者被取消时，不影响正在进行的查询与其它等待者
+        return list(await shield(loading))
+
+    def invalidate(self, relation_type: type[Relation] | None = None, /) -> None:
+        """清除指定结构体类型的缓存，未指定时清除全部缓存。"""
+        self._generation += 1
+
+        if relation_type is None:
+            self._entries.clear()
+            return
+
+        for key in [x for x in self._entries if x[0] is relation_type]:
+            del self._entries[key]
+
+    def invalidate_channel(self, channel: str, /) -> None:
+        """清除关联指定频道的缓存。"""
+        self._channel_generations[channel] = (
+            self._channel_generations.get(channel, 0) + 1
+        )
+
+        for key in [x for x, y in self._entries.items() if channel in y.channels]:
+            del self._entries[key]
+
+    async def _listen(self, conninfo: str) -> None:
+        attempt = 0
+
+        while True:
+            try:
+                async with await AsyncConnection.connect(
+                    conninfo, autocommit=True
+                ) as conn:
+                    for channel in self._channels:
+                        await conn.execute(
+                            sql.SQL("LISTEN {}").format(sql.Identifier(channel))
+                        )
+
+                    # 监听开始前的通知可能已遗漏
+                    self.invalidate()
+                    attempt = 0
+
+                    async for notify in conn.notifies():
+                        self.invalidate_channel(notify.channel)
+            except Error as e:
+                self.invalidate()
+                print(  # noqa: T201
+                    f"查询缓存监听失败，已清除全部缓存\n{pretty_exception(e)}",
+                    file=sys.stderr,
+                )
+                await sleep(get_backoff_delay(attempt))
+                attempt += 1
+
+    def start(self) -> None:
+        """启动监听任务，需在事件循环中调用。"""
+        if (
+            self._listen_conninfo is not None
+            and self._channels
+            and self._listen_task is None
+        ):
+            self._listen_task = get_running_loop().create_task(
+                self._listen(self._listen_conninfo)
+            )
+
+    async def close(self) -> None:
+        """停止监听任务并清除全部缓存。"""
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            with suppress(CancelledError):
+                await self._listen_task
+            self._listen_task = None
+
+        self.invalidate()
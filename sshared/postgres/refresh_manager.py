@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from asyncio import CancelledError, Event, Lock, Task, get_running_loop, sleep, wait_for
+from asyncio import TimeoutError as AsyncTimeoutError
+from contextlib import suppress
+from datetime import datetime, timezone
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING
+
+from psycopg import Error, sql
+
+from sshared.postgres.circuit_breaker import CircuitOpenError
+from sshared.postgres.pool import PoolTimeoutError
+from sshared.strict_struct import NonNegativeFloat, StrictFrozenStruct
+
+if TYPE_CHECKING:
+    from psycopg import AsyncConnection
+
+    from sshared.postgres.materialized_view import MaterializedView
+    from sshared.postgres.pool import Pool
+
+# 存在仅由列组成、没有 WHERE 条件的唯一索引，且已填充数据时，才能并发刷新
+_CAN_REFRESH_CONCURRENTLY_STATEMENT = """
+SELECT c.relispopulated AND EXISTS (
+    SELECT 1 FROM pg_index AS i
+    WHERE i.indrelid = c.oid
+        AND i.indisunique
+        AND i.indisvalid
+        AND i.indpred IS NULL
+        AND i.indexprs IS NULL
+)
+FROM pg_class AS c
+WHERE c.oid = %s::regclass
+"""
+
+
+class RefreshStatus(StrictFrozenStruct, frozen=True, eq=False, gc=False):
+    # 最近一次成功刷新的完成时间与耗时（秒），从未刷新时为 None
+    refreshed_at: datetime | None
+    duration: NonNegativeFloat | None
+    refreshing: bool
+    # 最近一次刷新失败的原因，刷新成功后清除
+    error: str | None
+
+
+class _ViewState:
+    __slots__ = (
+        "attempted_at",
+        "concurrently",
+        "duration",
+        "error",
+        "event",
+        "interval",
+        "lock",
+        "name",
+        "refreshed_at",
+        "task",
+    )
+
+    def __init__(
+        self, name: str, *, interval: float | None, concurrently: bool | None
+    ) -> None:
+        self.name = name
+        self.interval = interval
+        self.concurrently = concurrently
+
+        self.event = Event()
+        # 同一物化视图的刷新不会重叠
+        self.lock = Lock()
+        self.task: Task | None = None
+
+        # 用于计算下次定时刷新的时间，刷新失败时同样更新，避免连续重试
+        self.attempted_at = monotonic()
+        self.refreshed_at: datetime | None = None
+        self.duration: float | None = None
+        self.error: str | None = None
+
+
+class RefreshManager:
+    """物化视图刷新管理器。
+
+    注册的物化视图按 interval 秒定时刷新，或通过 request_refresh 触发刷新。
+    触发后等待 debounce 秒，期间的其它请求合并为一次刷新；
+    刷新过程中收到的请求会在本次刷新完成后再次触发刷新。
+
+    concurrently 为 None 时，在每次刷新前检测是否可以使用 CONCURRENTLY，
+    即存在唯一索引且已填充数据，此时刷新不会阻塞读取。
+    """
+
+    def __init__(self, pool: Pool, /, *, debounce: float = 1.0) -> None:
+        self._pool = pool
+        self._debounce = debounce
+
+        self._views: dict[type[MaterializedView], _ViewState] = {}
+        self._started = False
+
+    def _get_state(self, view_type: type[MaterializedView]) -> _ViewState:
+        state = self._views.get(view_type)
+        if state is None:
+            raise KeyError(f"物化视图 {view_type.__name__} 未注册")
+
+        return state
+
+    def _start_task(self, state: _ViewState) -> None:
+        state.task = get_running_loop().create_task(self._run(state))
+
+    def register(
+        self,
+        view_type: type[MaterializedView],
+        /,
+        *,
+        interval: float | None = None,
+        concurrently: bool | None = None,
+    ) -> None:
+        """注册物化视图，interval 为 None 时仅在请求时刷新。"""
+        if view_type in self._views:
+            raise ValueError(f"物化视图 {view_type.__name__} 已注册")
+
+        state = _ViewState(
+            view_type.get_table_name(), interval=interval, concurrently=concurrently
+        )
+        self._views[view_type] = state
+
+        if self._started:
+            self._start_task(state)
+
+    def request_refresh(self, view_type: type[MaterializedView], /) -> None:
+        """请求刷新物化视图，多次请求会合并为一次刷新。"""
+        self._get_state(view_type).event.set()
+
+    async def refresh(self, view_type: type[MaterializedView], /) -> None:
+        """立即刷新物化视图，如果正在刷新，则等待其完成后再次刷新。"""
+        await self._refresh(self._get_state(view_type))
+
+    def get_status(self, view_type: type[MaterializedView], /) -> RefreshStatus:
+        state = self._get_state(view_type)
+        return RefreshStatus(
+            refreshed_at=state.refreshed_at,
+            duration=state.duration,
+            refreshing=state.lock.locked(),
+            error=state.error,
+        )
+
+    def is_stale(self, view_type: type[MaterializedView], max_age: float, /) -> bool:
+        """最近一次成功刷新距今是否超过 max_age 秒，从未刷新时视为过期。"""
+        refreshed_at = self._get_state(view_type).refreshed_at
+        return (
+            refreshed_at is None
+            or (datetime.now(timezone.utc) - refreshed_at).total_seconds() > max_age
+        )
+
+    async def _can_refresh_concurrently(
+        self, conn: AsyncConnection, state: _ViewState
+    ) -> bool:
+        if state.concurrently is not None:
+            return state.concurrently
+
+        cursor = await conn.execute(
+            _CAN_REFRESH_CONCURRENTLY_STATEMENT,
+            (sql.Identifier(state.name).as_string(conn),),
+        )
+        row = await cursor.fetchone()
+        return row is not None and bool(row[0])
+
+    async def _refresh(self, state: _ViewState) -> None:
+        async with state.lock:
+            state.attempted_at = monotonic()
+
+            try:
+                async with self._pool.get_conn() as conn:
+                    concurrently = await self._can_refresh_concurrently(conn, state)
+
+                    start = perf_counter()
+                    await conn.execute(
+                        sql.SQL("REFRESH MATERIALIZED VIEW {}{}").format(
+                            sql.SQL("CONCURRENTLY ") if concurrently else sql.SQL(""),
+                            sql.Identifier(state.name),
+                        )
+                    )
+                    duration = perf_counter() - start
+            except (Error, CircuitOpenError, PoolTimeoutError) as e:
+                state.error = str(e)
+                raise
+
+            state.refreshed_at = datetime.now(timezone.utc)
+            state.duration = duration
+            state.error = None
+
+    def _get_timeout(self, state: _ViewState) -> float | None:
+        if state.interval is None:
+            return None
+
+        return max(state.interval - (monotonic() - state.attempted_at), 0.0)
+
+    async def _run(self, state: _ViewState) -> None:
+        while True:
+            with suppress(AsyncTimeoutError):
+                await wait_for(state.event.wait(), self._get_timeout(state))
+
+            # 由请求触发时，等待期间的其它请求合并为一次刷新
+            if state.event.is_set() and self._debounce > 0:
+                await sleep(self._debounce)
+            state.event.clear()
+
+            # 失败原因记录在状态中，等待下次定时或请求时重试
+            with suppress(Error, CircuitOpenError, PoolTimeoutError):
+                await self._refresh(state)
+
+    def start(self) -> None:
+        """启动后台刷新任务，需在事件循环中调用。"""
+        if self._started:
+            return
+
+        self._started = True
+        for state in self._views.values():
+            self._start_task(state)
+
+    async def close(self) -> None:
+        """停止所有后台刷新任务，正在进行的刷新会被取消。"""
+        self._started = False
+
+        for state in self._views.values():
+            if state.task is not None:
+                state.task.cancel()
+                with suppress(CancelledError):
+                    await state.task
+                state.task = None
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Sequence
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, TypeVar
+
+from msgspec import convert, inspect
+from psycopg import AsyncConnection, AsyncCursor, sql
+
+from sshared.postgres.columns import get_columns
+from sshared.postgres.stream import astream_rows
+from sshared.strict_struct import StrictFrozenStruct
+
+if TYPE_CHECKING:
+    from psycopg.abc import Params
+
+    from sshared.postgres.batch import QueryType
+
+T = TypeVar("T", bound="Relation")
+
+_ROW_MAKERS: dict[tuple[type, tuple[str, ...]], Callable[[Sequence[Any]], Any]] = {}
+
+
+def _get_row_maker(
+    struct_type: type[T], names: tuple[str, ...]
+) -> Callable[[Sequence[Any]], T]:
+    """获取将一行数据转换为结构体的函数，结果按类与列名缓存。
+
+    数据直接通过 msgspec.convert 校验并构建结构体，无需先转换为内置类型。
+    """
+    key = (struct_type, names)
+    maker = _ROW_MAKERS.get(key)
+    if maker is None:
+        # convert 按编码名读取字段，列名为字段名
+        info = inspect.type_info(struct_type)
+        encode_names = (
+            {x.name: x.encode_name for x in info.fields}
+            if isinstance(info, inspect.StructType)
+            else {}
+        )
+        keys = tuple(encode_names.get(x, x) for x in names)
+
+        def make_row(values: Sequence[Any]) -> T:
+            return convert(dict(zip(keys, values)), struct_type)
+
+        _ROW_MAKERS[key] = maker = make_row
+
+    return maker
+
+
+class Relation(StrictFrozenStruct, frozen=True, eq=False, forbid_unknown_fields=True):
+    """表、视图与物化视图结构体的基类。
+
+    子类通过 __table_name__ 指定表名或视图名，字段名即列名。
+    未指定查询语句时，查询该表或视图的所有列。
+    """
+
+    __table_name__: ClassVar[str]
+
+    @classmethod
+    def get_table_name(cls) -> str:
+        """获取表名或视图名，未指定 __table_name__ 时抛出 TypeError。"""
+        table_name = getattr(cls, "__table_name__", None)
+        if table_name is None:
+            raise TypeError(f"{cls.__name__} 未指定 __table_name__")
+
+        return table_name
+
+    @classmethod
+    def _get_select_statement(cls) -> sql.Composed:
+        return sql.SQL("SELECT {} FROM {}").format(
+            sql.SQL(", ").join(sql.Identifier(x) for x in get_columns(cls).names),
+            sql.Identifier(cls.get_table_name()),
+        )
+
+    @classmethod
+    def _row_factory(cls: type[T], cursor: AsyncCursor) -> Callable[[Sequence[Any]], T]:
+        if cursor.description is None:
+            raise TypeError("查询语句没有返回结果")
+
+        return _get_row_maker(cls, tuple(x.name for x in cursor.description))
+
+    @classmethod
+    async def fetch(
+        cls: type[T],
+        conn: AsyncConnection,
+        query: QueryType | None = None,
+        params: Params | None = None,
+        /,
+    ) -> list[T]:
+        """执行查询并返回所有结果。"""
+        async with conn.cursor(row_factory=cls._row_factory) as cursor:
+            await cursor.execute(
+                query if query is not None else cls._get_select_statement(), params
+            )
+            return await cursor.fetchall()
+
+    @classmethod
+    async def fetch_one(
+        cls: type[T],
+        conn: AsyncConnection,
+        query: QueryType,
+        params: Params | None = None,
+        /,
+    ) -> T | None:
+        """执行查询并返回第一条结果，没有结果时返回 None。"""
+        async with conn.cursor(row_factory=cls._row_factory) as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchone()
+
+    @classmethod
+    async def stream(
+        cls: type[T],
+        conn: AsyncConnection,
+        query: QueryType | None = None,
+        params: Params | None = None,
+        /,
+        *,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[T]:
+        """使用服务端游标逐条返回查询结果，每次从数据库获取 batch_size 条。"""
+        async for item in astream_rows(
+            conn,
+            query if query is not None else cls._get_select_statement(),
+            params,
+            name=f"sshared_{cls.__name__.lower()}_stream",
+            batch_size=batch_size,
+            row_factory=cls._row_factory,
+        ):
+            yield item
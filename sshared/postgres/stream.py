@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterator
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from psycopg import AsyncConnection, Connection
+    from psycopg.abc import Params
+    from psycopg.rows import AsyncRowFactory, RowFactory
+
+    from sshared.postgres.batch import QueryType
+
+
+def stream_rows(  # noqa: PLR0913
+    conn: Connection,
+    query: QueryType,
+    params: Params | None = None,
+    /,
+    *,
+    name: str,
+    batch_size: int = 1000,
+    row_factory: RowFactory[Any] | None = None,
+) -> Iterator[Any]:
+    """使用名为 name 的服务端游标逐行返回查询结果。
+
+    每次从数据库获取 batch_size 行，内存占用与结果总数无关。
+    服务端游标只能在事务中使用，迭代完成前，连接处于事务中，不能用于其它查询。
+    """
+    cursor = (
+        conn.cursor(name, row_factory=row_factory)
+        if row_factory is not None
+        else conn.cursor(name)
+    )
+    with conn.transaction(), cursor:
+        cursor.itersize = batch_size
+        cursor.execute(query, params)
+        yield from cursor
+
+
+async def astream_rows(  # noqa: PLR0913
+    conn: AsyncConnection,
+    query: QueryType,
+    params: Params | None = None,
+    /,
+    *,
+    name: str,
+    batch_size: int = 1000,
+    row_factory: AsyncRowFactory[Any] | None = None,
+) -> AsyncIterator[Any]:
+    """stream_rows 的 asyncio 版本。"""
+    cursor = (
+        conn.cursor(name, row_factory=row_factory)
+        if row_factory is not None
+        else conn.cursor(name)
+    )
+    transaction = conn.transaction()
+    async with transaction, cursor:
+        cursor.itersize = batch_size
+        await cursor.execute(query, params)
+        async for row in cursor:
+            yield row
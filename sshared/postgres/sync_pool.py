@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+from collections.abc import Generator
+from contextlib import contextmanager, suppress
+from threading import Condition, local
+from time import monotonic
+
+from psycopg import Connection, OperationalError
+from psycopg.pq import TransactionStatus
+
+from sshared.postgres.circuit_breaker import CircuitBreaker, connect_with_retry
+from sshared.postgres.pool import PoolTimeoutError
+
+
+class _PooledSyncConn:
+    __slots__ = ("conn", "last_used_at")
+
+    def __init__(self, conn: Connection) -> None:
+        self.conn = conn
+        self.last_used_at = monotonic()
+
+
+class _ThreadCheckout(local):
+    pooled: _PooledSyncConn | None = None
+
+
+class SyncPool:
+    """线程安全的同步连接池。
+
+    同一线程中嵌套调用 get_conn 时复用已取出的连接。
+    没有可用连接时通过条件变量等待归还，超过 acquire_timeout 秒抛出 PoolTimeoutError。
+
+    空闲时间超过 check_interval 秒的连接在取出时检测，其余连接直接使用。
+    归还时已断开、已损坏或仍处于事务中的连接会被丢弃。
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        connection_string: str,
+        /,
+        *,
+        min_size: int = 1,
+        max_size: int = 4,
+        app_name: str | None = None,
+        check_interval: float = 5.0,
+        acquire_timeout: float | None = 30.0,
+        circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self._connection_string = connection_string
+        self._min_size = min_size
+        self._max_size = max_size
+        self._app_name = app_name
+        self._check_interval = check_interval
+        self._acquire_timeout = acquire_timeout
+        self._circuit_breaker = (
+            circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        )
+
+        self._cond = Condition()
+        # 后进先出，优先使用最近归还的连接
+        self._idle: list[_PooledSyncConn] = []
+        # 包含已创建和正在创建的连接
+        self._total_conns_count = 0
+        self._checkout = _ThreadCheckout()
+
+    def _new_conn(self, *, wait: bool = False) -> _PooledSyncConn:
+        """创建新连接，调用方需已预留连接数量，创建失败时释放预留的数量。
+
+        如果遇到异常，以指数增长的随机间隔重试，直到连接成功或断路器断开。
+        wait 为 True 时，断路器断开后继续等待，直到连接成功。
+        """
+        try:
+            conn = connect_with_retry(
+                lambda: Connection.connect(
+                    self._connection_string,
+                    autocommit=True,
+                    application_name=self._app_name,
+                ),
+                self._circuit_breaker,
+                wait=wait,
+            )
+        except BaseException:
+            self._release_slot()
+            raise
+
+        return _PooledSyncConn(conn)
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._total_conns_count -= 1
+            # 唤醒一个等待者，由其创建新连接
+            self._cond.notify()
+
+    def _discard_conn(self, pooled: _PooledSyncConn) -> None:
+        with suppress(OperationalError):
+            pooled.conn.close()
+        self._release_slot()
+
+    def _check_conn(self, pooled: _PooledSyncConn) -> bool:
+        """检测空闲时间超过 check_interval 的连接，其余连接视为正常。"""
+        if monotonic() - pooled.last_used_at <= self._check_interval:
+            return True
+
+        try:
+            pooled.conn.execute("")
+        except OperationalError:
+            return False
+        else:
+            return True
+
+    def _is_reusable(self, conn: Connection) -> bool:
+        return (
+            not conn.closed
+            and not conn.broken
+            and conn.info.transaction_status == TransactionStatus.IDLE
+        )
+
+    def _acquire(self, timeout: float | None) -> _PooledSyncConn:
+        deadline = monotonic() + timeout if timeout is not None else None
+
+        while True:
+            with self._cond:
+                while not self._idle and self._total_conns_count >= self._max_size:
+                    remaining = deadline - monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"获取连接超时（{timeout}s），"
+                            f"当前连接数量：{self._total_conns_count}"
+                        )
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    # 预留连接数量，在锁外创建连接
+                    self._total_conns_count += 1
+                    pooled = None
+
+            if pooled is None:
+                return self._new_conn()
+            if self._check_conn(pooled):
+                return pooled
+
+            self._discard_conn(pooled)
+
+    def _release(self, pooled: _PooledSyncConn) -> None:
+        if not self._is_reusable(pooled.conn):
+            self._discard_conn(pooled)
+            return
+
+        pooled.last_used_at = monotonic()
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    def prepare(self) -> None:
+        """创建新连接，直到连接池至少有 min_size 个连接。
+
+        数据库不可用时，不因断路器断开而失败，而是等待直到连接成功。
+        """
+        while True:
+            with self._cond:
+                if self._total_conns_count >= self._min_size:
+                    return
+                self._total_conns_count += 1
+
+            self._release(self._new_conn(wait=True))
+
+    def close(self) -> None:
+        """关闭所有空闲连接，调用此方法后，该连接池不应再被使用。"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+
+        for pooled in idle:
+            self._discard_conn(pooled)
+
+    @contextmanager
+    def get_conn(
+        self, *, timeout: float | None = None, reuse_thread_conn: bool = True
+    ) -> Generator[Connection]:
+        """获取连接。
+
+        同一线程中嵌套调用时返回同一连接，最外层退出时归还。
+        reuse_thread_conn 为 False 时总是取出另一个连接，该连接不参与嵌套复用，
+        适用于不能在调用方事务中执行的写入（如日志）。
+        超过 timeout 秒（未指定时使用 acquire_timeout）仍未获取到连接时，
+        抛出 PoolTimeoutError。
+        """
+        if timeout is None:
+            timeout = self._acquire_timeout
+
+        if not reuse_thread_conn:
+            pooled = self._acquire(timeout)
+            try:
+                yield pooled.conn
+            finally:
+                self._release(pooled)
+            return
+
+        checkout = self._checkout
+        # 嵌套调用，由最外层负责归还
+        if checkout.pooled is not None:
+            yield checkout.pooled.conn
+            return
+
+        pooled = self._acquire(timeout)
+        checkout.pooled = pooled
+        try:
+            yield pooled.conn
+        finally:
+            checkout.pooled = None
+            self._release(pooled)
@@ -1,5 +1,254 @@
-from sshared.strict_struct import StrictFrozenStruct
+from __future__ import annotations
 
+from collections.abc import AsyncIterable, Iterable
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, TypeVar
 
-class Table(StrictFrozenStruct, frozen=True, eq=False, forbid_unknown_fields=True):
-    pass
+from psycopg import AsyncConnection, AsyncCopy, sql
+
+from sshared.postgres.columns import get_columns
+from sshared.postgres.json import enhance_json_process
+from sshared.postgres.relation import Relation
+from sshared.strict_struct import NonNegativeInt, StrictFrozenStruct
+
+if TYPE_CHECKING:
+    from sshared.postgres.pool import Pool
+
+T = TypeVar("T", bound="Table")
+
+
+class UpsertResult(StrictFrozenStruct, frozen=True, eq=False, gc=False):
+    inserted: NonNegativeInt
+    updated: NonNegativeInt
+
+
+class _UpsertStatements:
+    __slots__ = ("copy", "merge", "stage")
+
+    def __init__(
+        self, stage: sql.Composed, copy: sql.Composed, merge: sql.Composed
+    ) -> None:
+        self.stage = stage
+        self.copy = copy
+        self.merge = merge
+
+
+_UPSERT_STATEMENTS: dict[type, _UpsertStatements] = {}
+_COPY_TYPES: dict[type, tuple[int | str, ...]] = {}
+
+# 域类型使用其基础类型的二进制格式
+_COLUMN_TYPES_STATEMENT = """
+SELECT a.attname, CASE WHEN t.typtype = 'd' THEN t.typbasetype ELSE a.atttypid END
+FROM pg_attribute AS a
+JOIN pg_type AS t ON t.oid = a.atttypid
+WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+"""
+
+
+async def _write_rows(
+    copy: AsyncCopy,
+    items: Iterable[Any] | AsyncIterable[Any],
+    getter: Callable[[Any], tuple[Any, ...]],
+) -> int:
+    count = 0
+
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            await copy.write_row(getter(item))
+            count += 1
+    else:
+        for item in items:
+            await copy.write_row(getter(item))
+            count += 1
+
+    return count
+
+
+class Table(Relation, frozen=True, eq=False, forbid_unknown_fields=True):
+    """数据表结构体基类。
+
+    子类通过 __table_name__ 指定表名，字段名即列名。
+    二进制 COPY 要求类型完全一致，列类型首次写入时从数据表的系统目录读取，
+    并按类缓存。通过 Meta(extra={"pg_type": ...}) 指定的类型优先，
+    系统目录中的类型无法识别时，按字段类型推断，datetime 字段根据 Meta(tz=True)
+    对应 timestamptz 或 timestamp。
+
+    使用 upsert 时需通过 __conflict_keys__ 指定冲突键，
+    数据表上必须存在包含且仅包含这些列的唯一索引或主键。
+    """
+
+    __conflict_keys__: ClassVar[tuple[str, ...]]
+
+    @classmethod
+    def _get_copy_statement(cls) -> sql.Composed:
+        return sql.SQL("COPY {} ({}) FROM STDIN (FORMAT BINARY)").format(
+            sql.Identifier(cls.get_table_name()),
+            sql.SQL(", ").join(sql.Identifier(x) for x in get_columns(cls).names),
+        )
+
+    @classmethod
+    async def _get_copy_types(cls, conn: AsyncConnection) -> tuple[int | str, ...]:
+        copy_types = _COPY_TYPES.get(cls)
+        if copy_types is not None:
+            return copy_types
+
+        columns = get_columns(cls)
+        cursor = await conn.execute(
+            _COLUMN_TYPES_STATEMENT,
+            (sql.Identifier(cls.get_table_name()).as_string(conn),),
+        )
+        oids: dict[str, int] = dict(await cursor.fetchall())
+
+        registry = conn.adapters.types
+        types: list[int | str] = []
+        for name, pg_type, override in zip(
+            columns.names, columns.pg_types, columns.overrides
+        ):
+            oid = oids.get(name)
+            if override is not None:
+                types.append(override)
+            # 自定义类型（如枚举）未在 psycopg 中注册时，使用推断的类型
+            elif oid is not None and registry.get(oid) is not None:
+                types.append(oid)
+            else:
+                types.append(pg_type)
+
+        copy_types = tuple(types)
+        _COPY_TYPES[cls] = copy_types
+        return copy_types
+
+    @classmethod
+    def _get_upsert_statements(cls) -> _UpsertStatements:
+        statements = _UPSERT_STATEMENTS.get(cls)
+        if statements is not None:
+            return statements
+
+        table_name = cls.get_table_name()
+        names = get_columns(cls).names
+
+        keys = getattr(cls, "__conflict_keys__", None)
+        if not keys:
+            raise TypeError(f"{cls.__name__} 未指定 __conflict_keys__")
+        unknown_keys = set(keys) - set(names)
+        if unknown_keys:
+            raise TypeError(
+                f"{cls.__name__} 的冲突键 {', '.join(sorted(unknown_keys))} 不是字段"
+            )
+
+        table = sql.Identifier(table_name)
+        # 临时表仅对当前会话可见，在同一连接上复用
+        staging = sql.Identifier(f"{table_name}_upsert")
+        columns = sql.SQL(", ").join(sql.Identifier(x) for x in names)
+
+        updates = [x for x in names if x not in keys]
+        if updates:
+            action = sql.SQL("DO UPDATE SET {}").format(
+                sql.SQL(", ").join(
+                    sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(x))
+                    for x in updates
+                )
+            )
+        else:
+            action = sql.SQL("DO NOTHING")
+
+        statements = _UpsertStatements(
+            stage=sql.SQL(
+                "CREATE TEMP TABLE IF NOT EXISTS {staging} "
+                "ON COMMIT DELETE ROWS "
+                "AS SELECT {columns} FROM {table} WITH NO DATA; "
+                "TRUNCATE {staging}"
+            ).format(staging=staging, columns=columns, table=table),
+            copy=sql.SQL("COPY {} ({}) FROM STDIN (FORMAT BINARY)").format(
+                staging, columns
+            ),
+            # 新插入的行 xmax 为 0，据此区分插入与更新
+            merge=sql.SQL(
+                "WITH result AS ("
+                "INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} "
+                "ON CONFLICT ({keys}) {action} "
+                "RETURNING xmax = 0 AS inserted) "
+                "SELECT count(*) FILTER (WHERE inserted), "
+                "count(*) FILTER (WHERE NOT inserted) FROM result"
+            ).format(
+                table=table,
+                columns=columns,
+                staging=staging,
+                keys=sql.SQL(", ").join(sql.Identifier(x) for x in keys),
+                action=action,
+            ),
+        )
+        _UPSERT_STATEMENTS[cls] = statements
+        return statements
+
+    @classmethod
+    async def copy_insert(
+        cls: type[T],
+        conn: AsyncConnection,
+        items: Iterable[T] | AsyncIterable[T],
+        /,
+    ) -> int:
+        """使用二进制 COPY 在指定连接上批量写入，返回写入的行数。
+
+        items 以流式方式写入，不会一次性加载到内存中。
+        """
+        enhance_json_process()
+
+        getter = get_columns(cls).getter
+        copy_types = await cls._get_copy_types(conn)
+        statement = cls._get_copy_statement()
+        async with conn.cursor() as cursor, cursor.copy(statement) as copy:
+            copy.set_types(copy_types)
+            return await _write_rows(copy, items, getter)
+
+    @classmethod
+    async def bulk_insert(
+        cls: type[T],
+        pool: Pool,
+        items: Iterable[T] | AsyncIterable[T],
+        /,
+    ) -> int:
+        """从连接池获取连接，使用二进制 COPY 批量写入，返回写入的行数。"""
+        async with pool.get_conn() as conn:
+            return await cls.copy_insert(conn, items)
+
+    @classmethod
+    async def upsert(
+        cls: type[T],
+        conn: AsyncConnection,
+        items: Iterable[T] | AsyncIterable[T],
+        /,
+    ) -> UpsertResult:
+        """在指定连接上批量插入或更新，返回插入与更新的行数。
+
+        数据先通过二进制 COPY 写入临时表，再由一条语句合并到数据表，
+        整个过程在一个事务中完成。冲突键相同的行在同一批次中只能出现一次。
+        所有列均为冲突键时，已存在的行不会被更新。
+        """
+        enhance_json_process()
+
+        getter = get_columns(cls).getter
+        # 临时表的列类型与数据表相同
+        copy_types = await cls._get_copy_types(conn)
+        statements = cls._get_upsert_statements()
+        async with conn.transaction(), conn.cursor() as cursor:
+            await cursor.execute(statements.stage)
+
+            async with cursor.copy(statements.copy) as copy:
+                copy.set_types(copy_types)
+                await _write_rows(copy, items, getter)
+
+            await cursor.execute(statements.merge)
+            row = await cursor.fetchone()
+
+        inserted, updated = row if row is not None else (0, 0)
+        return UpsertResult(inserted=inserted, updated=updated)
+
+    @classmethod
+    async def bulk_upsert(
+        cls: type[T],
+        pool: Pool,
+        items: Iterable[T] | AsyncIterable[T],
+        /,
+    ) -> UpsertResult:
+        """从连接池获取连接，批量插入或更新，返回插入与更新的行数。"""
+        async with pool.get_conn() as conn:
+            return await cls.upsert(conn, items)
@@ -1,5 +1,5 @@
-from sshared.strict_struct import StrictFrozenStruct
+from sshared.postgres.relation import Relation
 
 
-class View(StrictFrozenStruct, frozen=True, eq=False, forbid_unknown_fields=True):
-    pass
+class View(Relation, frozen=True, eq=False, forbid_unknown_fields=True):
+    """视图结构体基类，子类通过 __table_name__ 指定视图名。"""